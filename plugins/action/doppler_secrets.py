@@ -0,0 +1,137 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.common.text.converters import to_text
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+from ansible_collections.dcostakos.doppler.plugins.plugin_utils.doppler_cache import (
+    HAS_CRYPTOGRAPHY,
+    HAS_FCNTL,
+    SharedSecretsCache,
+)
+
+display = Display()
+
+# long enough for every host of a batch to pick up the result, the task uuid,
+# the batch and the execution count in the key keep it from leaking any further
+RESULT_TTL = 3600
+# one directory per ansible-playbook run, removed by a later run once its owner is gone
+RESULT_DIR = '~/.ansible/tmp/doppler_results'
+
+
+def run_dir():
+    """Result directory of this run, the workers are all children of the controller process."""
+    base = os.path.expanduser(RESULT_DIR)
+    owner = os.getppid()
+    if os.path.isdir(base):
+        for name in os.listdir(base):
+            try:
+                pid = int(name[len('run-'):]) if name.startswith('run-') else None
+            except ValueError:
+                continue
+            if pid is not None and pid != owner and not process_alive(pid):
+                shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+    return os.path.join(base, f"run-{owner}")
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ActionModule(ActionBase):
+    """Run doppler_secrets once on the controller for all hosts of a task.
+
+    The module only talks to the Doppler API, so there is nothing to do on
+    the managed host. Each fork runs it through a local connection instead,
+    and identical invocations of the same task are coalesced through an
+    encrypted single-flight store, so one fork calls the API and every other
+    host gets its result.
+    """
+
+    TRANSFERS_FILES = False
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        module_args = self._task.args.copy()
+        if module_args.get('src'):
+            # src lives on the controller, next to the playbook or role
+            try:
+                module_args['src'] = self._find_needle('files', module_args['src'])
+            except AnsibleError as e:
+                result.update(failed=True, msg=to_text(e))
+                return result
+
+        token = module_args.get('token') or os.environ.get('DOOPLER_TOKEN')
+        if not token or not HAS_CRYPTOGRAPHY or not HAS_FCNTL:
+            # nothing safe to encrypt shared results with, run without coalescing
+            result.update(self._run_on_controller(module_args, task_vars))
+            return result
+
+        # only the hosts of one serial batch run a task together, a later
+        # batch runs it again instead of replaying what an earlier one did
+        batch = sorted(task_vars.get('ansible_play_batch') or [])
+        key = hashlib.sha256(json.dumps(
+            [self._task._uuid, self._play_context.check_mode, module_args, batch],
+            sort_keys=True, default=str
+        ).encode('utf-8')).hexdigest()
+
+        store = SharedSecretsCache(run_dir())
+        execution = store.next_execution(key, task_vars.get('inventory_hostname'))
+        shared = store.get_or_fetch(
+            ('action', key, execution), token, RESULT_TTL,
+            lambda: self._run_on_controller(module_args, task_vars),
+            # a failure is never handed to other hosts, each one tries for itself
+            cache_if=lambda r: not r.get('failed')
+        )
+        display.vvv(f"doppler_secrets coalesced results: {store.stats()}", host=task_vars.get('inventory_hostname'))
+        result.update(shared)
+        if not store.misses and 'doppler_metrics' in result:
+            # another fork made these calls, keep them from being counted once per host
+            result['doppler_metrics'] = dict(calls=0, errors=0, retries=0, bytes=0, time_ms=0.0, endpoints={})
+        return result
+
+    def _run_on_controller(self, module_args, task_vars):
+        local_vars = dict(task_vars)
+        local_vars['ansible_python_interpreter'] = sys.executable
+        # over the httpapi connection the module still runs here, but on the
+        # warm session of the persistent connection instead of its own
+        socket_path = getattr(self._connection, 'socket_path', None)
+        if socket_path:
+            local_vars['ansible_socket'] = socket_path
+
+        connection = self._shared_loader_obj.connection_loader.get('local', self._play_context, new_stdin=None)
+        connection.set_options(var_options={})
+        connection._shell.set_options(var_options={})
+
+        remote = self._connection
+        self._connection = connection
+        try:
+            return self._execute_module(
+                module_name='dcostakos.doppler.doppler_secrets',
+                module_args=module_args,
+                task_vars=local_vars
+            )
+        finally:
+            self._remove_tmp_path(connection._shell.tmpdir)
+            self._connection = remote
@@ -0,0 +1,221 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: doppler_metrics
+author:
+- Dave Costakos <dcostako@redhat.com>
+type: aggregate
+short_description: Summarize the Doppler API calls made across a playbook run
+description:
+- Collects the C(doppler_metrics) returned by every module of this collection and
+  recorded by every evaluation of the C(dcostakos.doppler.doppler_secrets) lookup
+- At the end of the run, reports per endpoint call counts, average and p50/p95/p99 latency,
+  error and retry rates, and the hosts that spent the most time waiting on the API
+- Percentiles are read off the fixed latency buckets every module and lookup returns, each is
+  the upper bound of the bucket holding it, or the slowest call when that is lower
+- Lookups run in the worker forks, they hand their metrics over through NDJSON files
+  in a temporary spool directory named by the C(DOPPLER_METRICS_SPOOL) environment variable
+- Also exports a C(DOPPLER_TRACE_ID) derived from the task uuid at the start of every task,
+  so with C(DOPPLER_TRACE_FILE) set the spans of all hosts of a task share one trace.
+  A C(TRACEPARENT) or C(DOPPLER_TRACE_ID) set by the caller is left alone
+requirements:
+- enable in ansible.cfg with C(callbacks_enabled = dcostakos.doppler.doppler_metrics)
+options:
+  output_file:
+    description:
+    - Also write the report as JSON to this file, for dashboards
+    type: path
+    env:
+    - name: DOPPLER_METRICS_OUTPUT
+    ini:
+    - section: callback_doppler_metrics
+      key: output_file
+  slowest_hosts:
+    description:
+    - Number of hosts listed in the slowest hosts part of the report
+    type: int
+    default: 5
+    env:
+    - name: DOPPLER_METRICS_SLOWEST_HOSTS
+    ini:
+    - section: callback_doppler_metrics
+      key: slowest_hosts
+'''
+
+import atexit
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from ansible.plugins.callback import CallbackBase
+from ansible_collections.dcostakos.doppler.plugins.plugin_utils.doppler_metrics import (
+    SPOOL_ENV,
+    read_spool,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_metrics import (
+    LATENCY_BUCKETS_MS,
+    OVERFLOW_BUCKET,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_trace import (
+    TRACEPARENT_ENV,
+    TRACE_ID_ENV,
+)
+
+
+def percentile(buckets, max_ms, pct):
+    # nearest rank over the histogram, reported as the upper bound of the
+    # bucket holding it, or the slowest call when that is lower
+    calls = sum(buckets.values())
+    if not calls:
+        return None
+    rank = max(1, int(math.ceil(pct / 100.0 * calls)))
+    seen = 0
+    for bound in [str(b) for b in LATENCY_BUCKETS_MS] + [OVERFLOW_BUCKET]:
+        seen += buckets.get(bound, 0)
+        if seen >= rank:
+            return max_ms if bound == OVERFLOW_BUCKET else min(float(bound), max_ms)
+    return max_ms
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'dcostakos.doppler.doppler_metrics'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self.endpoints = {}
+        self.hosts = {}
+        self.started = time.time()
+        # forks are started after the callbacks are loaded and inherit this
+        self.spool = tempfile.mkdtemp(prefix='doppler-metrics-')
+        os.environ[SPOOL_ENV] = self.spool
+        atexit.register(shutil.rmtree, self.spool, True)
+        self.trace_per_task = not (os.environ.get(TRACEPARENT_ENV) or os.environ.get(TRACE_ID_ENV))
+
+    def add(self, summary, host=None, source='module'):
+        if not isinstance(summary, dict):
+            return
+        for name, endpoint in (summary.get('endpoints') or {}).items():
+            entry = self.endpoints.setdefault(name, dict(calls=0, errors=0, retries=0, bytes=0, time_ms=0.0,
+                                                         max_ms=0.0, latency_buckets={}))
+            for key in ('calls', 'errors', 'retries', 'bytes', 'time_ms'):
+                entry[key] += endpoint.get(key, 0)
+            entry['max_ms'] = max(entry['max_ms'], endpoint.get('max_ms', 0.0))
+            for bound, count in (endpoint.get('latency_buckets') or {}).items():
+                entry['latency_buckets'][bound] = entry['latency_buckets'].get(bound, 0) + count
+
+        host_entry = self.hosts.setdefault(host or 'localhost', dict(calls=0, errors=0, time_ms=0.0, lookups=0, tasks=0))
+        host_entry['calls'] += summary.get('calls', 0)
+        host_entry['errors'] += summary.get('errors', 0)
+        host_entry['time_ms'] += summary.get('time_ms', 0.0)
+        host_entry['lookups' if source == 'lookup' else 'tasks'] += 1
+
+    def _collect(self, result):
+        data = result._result
+        host = result._host.get_name()
+        self.add(data.get('doppler_metrics'), host)
+        # loops return the metrics of every item
+        for item in data.get('results') or []:
+            if isinstance(item, dict):
+                self.add(item.get('doppler_metrics'), host)
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        if self.trace_per_task:
+            # the workers of this task are forked after this and inherit it
+            os.environ[TRACE_ID_ENV] = hashlib.sha256(task._uuid.encode('utf-8')).hexdigest()[:32]
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._collect(result)
+
+    def report(self):
+        endpoints = {}
+        for name, entry in sorted(self.endpoints.items()):
+            buckets, max_ms = entry['latency_buckets'], round(entry['max_ms'], 2)
+            endpoints[name] = dict(
+                calls=entry['calls'],
+                errors=entry['errors'],
+                retries=entry['retries'],
+                bytes=entry['bytes'],
+                error_rate=round(entry['errors'] / entry['calls'], 4) if entry['calls'] else 0.0,
+                retry_rate=round(entry['retries'] / entry['calls'], 4) if entry['calls'] else 0.0,
+                avg_ms=round(entry['time_ms'] / entry['calls'], 2) if entry['calls'] else None,
+                p50_ms=percentile(buckets, max_ms, 50),
+                p95_ms=percentile(buckets, max_ms, 95),
+                p99_ms=percentile(buckets, max_ms, 99),
+                max_ms=max_ms,
+            )
+
+        slowest = sorted(self.hosts.items(), key=lambda h: h[1]['time_ms'], reverse=True)
+        return dict(
+            started=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started)),
+            duration_s=round(time.time() - self.started, 3),
+            calls=sum(e['calls'] for e in endpoints.values()),
+            errors=sum(e['errors'] for e in endpoints.values()),
+            retries=sum(e['retries'] for e in endpoints.values()),
+            hosts=len(self.hosts),
+            endpoints=endpoints,
+            slowest_hosts=[
+                dict(host=name, time_ms=round(entry['time_ms'], 2), calls=entry['calls'], errors=entry['errors'],
+                     tasks=entry['tasks'], lookups=entry['lookups'])
+                for name, entry in slowest[:self.get_option('slowest_hosts')]
+            ],
+        )
+
+    def v2_playbook_on_stats(self, stats):
+        for record in read_spool(self.spool):
+            self.add(record.get('doppler_metrics'), record.get('host'), record.get('source', 'lookup'))
+        shutil.rmtree(self.spool, ignore_errors=True)
+        os.environ.pop(SPOOL_ENV, None)
+        if self.trace_per_task:
+            os.environ.pop(TRACE_ID_ENV, None)
+
+        report = self.report()
+        if not report['calls']:
+            return
+
+        self._display.banner('DOPPLER API METRICS')
+        self._display.display(
+            f"{report['calls']} calls, {report['errors']} errors, {report['retries']} retries "
+            f"from {report['hosts']} hosts"
+        )
+        width = max(len(name) for name in report['endpoints'])
+        self._display.display(
+            f"{'endpoint':{width}s} {'calls':>7s} {'err%':>6s} {'retry%':>7s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}"
+        )
+        for name, entry in report['endpoints'].items():
+            self._display.display(
+                f"{name:{width}s} {entry['calls']:7d} {entry['error_rate'] * 100:6.1f} {entry['retry_rate'] * 100:7.1f} "
+                f"{entry['p50_ms']:9.1f} {entry['p95_ms']:9.1f} {entry['p99_ms']:9.1f}"
+            )
+        if report['slowest_hosts']:
+            self._display.display('slowest hosts:')
+            for entry in report['slowest_hosts']:
+                self._display.display(
+                    f"  {entry['host']}: {entry['time_ms']:.1f} ms in {entry['calls']} calls "
+                    f"({entry['tasks']} tasks, {entry['lookups']} lookups)"
+                )
+
+        output_file = self.get_option('output_file')
+        if output_file:
+            try:
+                with open(output_file, 'w') as f:
+                    json.dump(report, f, indent=2, sort_keys=True)
+            except OSError as e:
+                self._display.warning(f"Unable to write Doppler metrics to {output_file}: {e}")
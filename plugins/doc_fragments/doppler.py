@@ -0,0 +1,127 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+
+    # Options shared by every module through DopplerModule
+    DOCUMENTATION = r'''
+options:
+  max_retries:
+    description:
+    - How many times a single API call is retried after a 429 or 5xx response or a connection error
+    - Writes sent as POST, such as creates, are only retried after a 429 or 503 response,
+      since after any other failure they may already have been applied
+    - May default to OS Environment variable DOPPLER_MAX_RETRIES
+    type: int
+    required: false
+    default: 3
+  retry_backoff:
+    description:
+    - Base delay in seconds for the exponential backoff between retries
+    - The actual delay is picked at random between 0 and the capped exponential value
+    - A C(Retry-After) or exhausted C(X-RateLimit-Remaining) header from Doppler takes precedence
+    type: float
+    required: false
+    default: 1.0
+  retry_max_delay:
+    description:
+    - Upper bound in seconds for a single wait between retries
+    - If Doppler asks to wait longer than this, the call is not retried
+    type: float
+    required: false
+    default: 30.0
+  retry_budget:
+    description:
+    - Total number of retries allowed across all API calls of one task
+    - May default to OS Environment variable DOPPLER_RETRY_BUDGET
+    type: int
+    required: false
+    default: 10
+  rate_limit:
+    description:
+    - Maximum number of API requests per second, enforced before every call
+    - The budget is shared through I(rate_limit_file) by every process on the same machine
+      using the same file, so a large fan-out stays under the Doppler quota
+    - Rate limiting is disabled when not set or C(0)
+    - May default to OS Environment variable DOPPLER_RATE_LIMIT
+    type: float
+    required: false
+  rate_limit_burst:
+    description:
+    - Number of requests that may be sent back to back before I(rate_limit) applies
+    - Defaults to one second worth of requests
+    type: int
+    required: false
+  rate_limit_file:
+    description:
+    - State file holding the shared token bucket
+    - Defaults to a per user file in the system temp directory, keyed on I(url) and I(token)
+    - May default to OS Environment variable DOPPLER_RATE_LIMIT_FILE
+    type: path
+    required: false
+  http_backend:
+    description:
+    - Library used to talk to the API
+    - C(builtin) uses a keep-alive session on the python standard library and needs nothing installed
+    - C(requests) uses the python requests library, which must then be installed
+    - May default to OS Environment variable DOPPLER_HTTP_BACKEND
+    type: str
+    required: false
+    default: builtin
+    choices:
+    - builtin
+    - requests
+notes:
+- When the task runs over the C(ansible.netcommon.httpapi) connection with
+  C(ansible_network_os=dcostakos.doppler.doppler), requests go through the warm
+  session of the persistent connection and I(url) and I(validate_certs) are ignored
+- Set C(DOPPLER_PROFILE=phases) in the environment of the executing host to write a timing
+  breakdown of each run (start up CPU time, argument spec, client setup, HTTP, JSON decoding,
+  result output) to C(DOPPLER_PROFILE_DIR), by default C(doppler-profile) in the temp directory.
+  C(DOPPLER_PROFILE=cprofile) also writes a pstats file of the run
+- Set C(DOPPLER_TRACE_FILE) in the environment of the executing host to append a trace of each
+  run to that file, one OTLP JSON export request per line. The run is the parent span of one client
+  span per API call. The trace id comes from C(TRACEPARENT) or C(DOPPLER_TRACE_ID) when set,
+  the dcostakos.doppler.doppler_metrics callback sets one per task
+'''
+
+    # Paging and trimming of list=true, shared by the modules that can list
+    LIST = r'''
+options:
+  per_page:
+    description:
+    - Number of items requested per page when I(list) is set, at least C(1)
+    type: int
+    default: 100
+  dest:
+    description:
+    - With I(list), write the items to this file as newline delimited JSON instead of returning them
+    - Keeps memory flat and the registered result small for very large workspaces
+    - The file is only replaced when its content changes
+    type: path
+  fields:
+    description:
+    - With I(list), keep only these keys of each item
+    - All keys are kept when not set
+    type: list
+    elements: str
+  filters:
+    description:
+    - With I(list), keep only items whose keys match all of these glob patterns
+    - Values are compared as strings, so a boolean key matches C(True) or C(False)
+    type: dict
+  limit:
+    description:
+    - With I(list), stop after this many items, at least C(1), no further pages are fetched
+    type: int
+  return_request:
+    description:
+    - Whether to echo the C(req) and C(status_code) of the API call in the result
+    - Turning it off keeps registered results compact
+    type: bool
+    default: true
+'''
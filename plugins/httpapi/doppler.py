@@ -0,0 +1,155 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: doppler
+author:
+- Dave Costakos <dcostako@redhat.com>
+short_description: HttpApi plugin keeping a warm Doppler API session across tasks
+description:
+- Lets the modules of this collection run through the C(ansible.netcommon.httpapi)
+  persistent connection
+- One pooled keep-alive session lives in the persistent connection process, so
+  only the first task of a play pays for the TCP/TLS handshake
+- Modules detect the connection and send their requests through it, retries and
+  rate limiting still happen in the module
+- Set C(ansible_connection=ansible.netcommon.httpapi) and
+  C(ansible_network_os=dcostakos.doppler.doppler), with C(ansible_host) pointing at the API host
+requirements:
+- ansible.netcommon
+options:
+  doppler_base_path:
+    description:
+    - Path of the API on the host, prepended to every request
+    type: str
+    default: /v3
+    vars:
+    - name: ansible_httpapi_doppler_base_path
+  doppler_token:
+    description:
+    - Authentication token used when a task does not pass its own I(token)
+    type: str
+    vars:
+    - name: ansible_httpapi_doppler_token
+  doppler_pool_maxsize:
+    description:
+    - Maximum number of connections kept warm in the session pool
+    type: int
+    default: 10
+    vars:
+    - name: ansible_httpapi_doppler_pool_maxsize
+  doppler_http_backend:
+    description:
+    - Library used by the persistent session
+    - C(builtin) uses a keep-alive session on the python standard library
+    - C(requests) uses the python requests library, which must be installed
+    type: str
+    default: builtin
+    choices:
+    - builtin
+    - requests
+    vars:
+    - name: ansible_httpapi_doppler_http_backend
+'''
+
+EXAMPLES = r'''
+# inventory
+# [doppler]
+# doppler_api ansible_host=api.doppler.com
+#
+# [doppler:vars]
+# ansible_connection=ansible.netcommon.httpapi
+# ansible_network_os=dcostakos.doppler.doppler
+# ansible_httpapi_use_ssl=true
+# ansible_httpapi_doppler_token="{{ vault_doppler_token }}"
+
+- hosts: doppler
+  gather_facts: false
+  tasks:
+  - name: Every task reuses the same warm session
+    dcostakos.doppler.doppler_secrets:
+      project: example-project
+      config: dev
+      secrets:
+        DB_USER: app
+'''
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils.common.text.converters import to_text
+from ansible_collections.ansible.netcommon.plugins.plugin_utils.httpapi_base import HttpApiBase
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_http import HTTPSession
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    POOL_CONNECTIONS,
+    DopplerException,
+    import_requests,
+)
+
+
+class HttpApi(HttpApiBase):
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._session = None
+
+    def _base_url(self):
+        host = self.connection.get_option('host')
+        port = self.connection.get_option('port')
+        scheme = 'https' if self.connection.get_option('use_ssl') else 'http'
+        netloc = f"{host}:{port}" if port else host
+        return f"{scheme}://{netloc}{self.get_option('doppler_base_path').rstrip('/')}"
+
+    def _get_session(self):
+        if self._session is None:
+            headers = {
+                "Accept": "application/json",
+                "Connection": "keep-alive",
+            }
+            token = self.get_option('doppler_token')
+            if token:
+                headers['Authorization'] = f"Bearer {token}"
+            validate_certs = self.connection.get_option('validate_certs')
+            pool_maxsize = self.get_option('doppler_pool_maxsize')
+
+            if self.get_option('doppler_http_backend') == 'requests':
+                try:
+                    requests, HTTPAdapter = import_requests()
+                except DopplerException as e:
+                    raise AnsibleConnectionFailure(str(e))
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.verify = validate_certs
+                session.headers.update(headers)
+            else:
+                session = HTTPSession(validate_certs=validate_certs, pool_maxsize=pool_maxsize, headers=headers)
+            self._session = session
+        return self._session
+
+    def send_doppler_request(self, method, path, params=None, json=None, token=None, timeout=None):
+        headers = {}
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+
+        response = self._get_session().request(
+            method,
+            f"{self._base_url()}{path}",
+            params=params,
+            json=json,
+            headers=headers,
+            timeout=timeout or self.connection.get_option('persistent_command_timeout')
+        )
+
+        # only plain data survives the trip back over the connection socket
+        body = response.request.body
+        return dict(
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            text=response.text,
+            url=response.request.url,
+            method=response.request.method,
+            body=to_text(body) if body is not None else None
+        )
@@ -14,8 +14,22 @@ DOCUMENTATION = '''
     - once a secret is retrieved, it is decoded and up to the developer to maintain the
       secrecy of the variable in which is is stored.
     - See https://docs.doppler.com/reference/secrets-get for details
+    - Any number of secret names may be passed as terms, they are all resolved
+      from a single read of the config and returned in the order requested.
+    - With C(DOPPLER_PROFILE=phases) or C(DOPPLER_PROFILE=cprofile) in the controller environment,
+      every evaluation writes a timing breakdown, and with cprofile a pstats file, to
+      C(DOPPLER_PROFILE_DIR).
+    - With C(DOPPLER_TRACE_FILE) set in the controller environment, every evaluation and its API
+      calls are appended to that file as OTLP JSON spans.
 
     options:
+        _terms:
+            description:
+            - Names of the Doppler secrets to retrieve
+            - When no terms are given, the I(name) option is used instead
+            type: list
+            elements: str
+            required: False
         project:
             description:
             - Unique identifier for the project object in Doppler
@@ -33,8 +47,22 @@ DOCUMENTATION = '''
             description:
               - Name of the Doppler secret.
               - may default to OS Environment variable DOPPLER_NAME
+              - Ignored when secret names are passed as terms
+            type: str
+            required: False
+        on_missing:
+            description:
+              - What to do when a requested secret does not exist in the config
+              - C(error) fails the lookup, C(warn) emits a warning and skips the name,
+                C(skip) silently skips the name
+              - Skipped names are left out of the returned list
             type: str
             required: False
+            default: error
+            choices:
+            - error
+            - warn
+            - skip
         url:
             description:
               - the URL for the API instance of doppler
@@ -54,6 +82,131 @@ DOCUMENTATION = '''
             type: int
             required: False
             default: 5
+        max_retries:
+            description:
+              - How many times the API call is retried after a 429 or 5xx response or a connection error
+            type: int
+            required: False
+            default: 3
+            env:
+              - name: DOPPLER_MAX_RETRIES
+        retry_backoff:
+            description:
+              - Base delay in seconds for the jittered exponential backoff between retries
+              - A C(Retry-After) or exhausted C(X-RateLimit-Remaining) header from Doppler takes precedence
+            type: float
+            required: False
+            default: 1.0
+        retry_max_delay:
+            description:
+              - Upper bound in seconds for a single wait between retries
+              - If Doppler asks to wait longer than this, the call is not retried
+            type: float
+            required: False
+            default: 30.0
+        retry_budget:
+            description:
+              - Total number of retries allowed for one evaluation of the lookup
+            type: int
+            required: False
+            default: 10
+            env:
+              - name: DOPPLER_RETRY_BUDGET
+        rate_limit:
+            description:
+              - Maximum number of API requests per second
+              - The budget is shared through I(rate_limit_file) with every fork, module and lookup
+                on the controller that uses the same file
+              - Rate limiting is disabled when not set or C(0)
+            type: float
+            required: False
+            env:
+              - name: DOPPLER_RATE_LIMIT
+        rate_limit_burst:
+            description:
+              - Number of requests that may be sent back to back before I(rate_limit) applies
+              - Defaults to one second worth of requests
+            type: int
+            required: False
+        rate_limit_file:
+            description:
+              - State file holding the shared token bucket
+              - Defaults to a per user file in the system temp directory, keyed on I(url) and I(token)
+            type: path
+            required: False
+            env:
+              - name: DOPPLER_RATE_LIMIT_FILE
+        http_backend:
+            description:
+              - Library used to talk to the API
+              - C(builtin) uses a keep-alive session on the python standard library
+              - C(requests) uses the python requests library, which must be installed
+            type: str
+            required: False
+            default: builtin
+            choices:
+              - builtin
+              - requests
+            env:
+              - name: DOPPLER_HTTP_BACKEND
+        cache_ttl:
+            description:
+              - Number of seconds a config read is reused by later lookups in the same process
+              - Entries are keyed on url, a hash of the token, project and config
+              - Set to 0 to disable caching
+            type: int
+            required: False
+            default: 60
+            env:
+              - name: DOPPLER_CACHE_TTL
+        negative_cache_ttl:
+            description:
+              - Number of seconds a miss is reused, either a config the API answered 404 for
+                or a requested secret absent from a cached config
+              - Past it, a miss refetches the config even if I(cache_ttl) has not expired,
+                so secrets created in the meantime show up
+              - Capped at I(cache_ttl), set to 0 to never reuse a miss
+            type: int
+            required: False
+            default: 10
+            env:
+              - name: DOPPLER_NEGATIVE_CACHE_TTL
+        default:
+            description:
+              - Value returned for every requested secret that does not exist, instead of applying I(on_missing)
+              - Also returned when the project or config does not exist
+              - Together with I(negative_cache_ttl), probing an optional secret costs no API call while the miss is cached
+            type: raw
+            required: False
+        cache_max_entries:
+            description:
+              - Maximum number of configs kept in the cache
+              - The least recently used config is evicted once the limit is reached
+            type: int
+            required: False
+            default: 128
+            env:
+              - name: DOPPLER_CACHE_MAX_ENTRIES
+        shared_cache:
+            description:
+              - Share cached config reads between all forks on the controller through
+                encrypted files in I(shared_cache_dir)
+              - Only one fork fetches a given config, the others wait for it and read the result
+              - Entries are encrypted with a key derived from the token and expire after I(cache_ttl)
+              - Requires the python cryptography library and a platform with fcntl
+            type: bool
+            required: False
+            default: False
+            env:
+              - name: DOPPLER_SHARED_CACHE
+        shared_cache_dir:
+            description:
+              - Directory holding the shared cache files, created with mode 0700 if missing
+            type: path
+            required: False
+            default: ~/.ansible/tmp/doppler_cache
+            env:
+              - name: DOPPLER_SHARED_CACHE_DIR
 '''
 
 EXAMPLES = '''
@@ -64,71 +217,221 @@ EXAMPLES = '''
              config='dev',
              token=doppler_token,
              project='secret_project') }}"
+
+- name: Retrieve several secrets with a single API call
+  ansible.builtin.set_fact:
+    db_settings: "{{ query('dcostakos.doppler.doppler_secrets',
+                           'DB_HOST', 'DB_USER', 'DB_PASSWORD',
+                           config='dev',
+                           token=doppler_token,
+                           project='secret_project') }}"
+
+- name: Read a config once for all forks instead of once per host
+  ansible.builtin.debug:
+    msg: "{{ lookup('dcostakos.doppler.doppler_secrets', 'API_KEY',
+                    shared_cache=true,
+                    config='dev',
+                    token=doppler_token,
+                    project='secret_project') }}"
+
+- name: Probe an optional secret, the miss is cached for negative_cache_ttl seconds
+  ansible.builtin.debug:
+    msg: "{{ lookup('dcostakos.doppler.doppler_secrets', 'FEATURE_FLAG',
+                    default='off',
+                    config='dev',
+                    token=doppler_token,
+                    project='secret_project') }}"
+- name: Retrieve optional secrets, skipping the ones that are not set
+  ansible.builtin.debug:
+    msg: "{{ query('dcostakos.doppler.doppler_secrets',
+                   'FEATURE_FLAG', 'LEGACY_KEY',
+                   on_missing='skip',
+                   config='dev',
+                   token=doppler_token,
+                   project='secret_project') }}"
 '''
 
 RETURN = '''
     _raw:
-        description: the decoded value of the secret
+        description: the decoded values of the secrets, in the order they were requested
         type: list
         elements: str
 '''
 
 # imports
-try:
-    import requests
-    HAS_REQUESTS = True
-except ImportError:
-    HAS_REQUESTS = False
-
+import functools
 import os
 from ansible.plugins.lookup import LookupBase
 from ansible.errors import AnsibleError
 from ansible.utils.display import Display
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerClient,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import (
+    phase,
+    run_profiled,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_ratelimit import rate_limit_error
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_trace import start_trace
+from ansible_collections.dcostakos.doppler.plugins.plugin_utils.doppler_metrics import spool_metrics
+from ansible_collections.dcostakos.doppler.plugins.plugin_utils.doppler_cache import (
+    HAS_CRYPTOGRAPHY,
+    HAS_FCNTL,
+    NOT_FOUND,
+    SecretsCache,
+    SharedSecretsCache,
+    cache_key,
+    is_not_found,
+    not_found,
+)
+
+# shared by every lookup evaluated in this process
+CACHE = SecretsCache()
 
 
 class DopplerException(Exception):
     pass
 
 
+def is_miss(secrets, names):
+    return is_not_found(secrets) or any(name not in secrets for name in names)
+
+
 class LookupModule(LookupBase):
     def run(self, terms=None, variables=None, **kwargs):
+        return run_profiled(lambda: self._run(terms, variables, **kwargs), 'lookup_doppler_secrets')
+
+    def _run(self, terms=None, variables=None, **kwargs):
+        # set when DOPPLER_TRACE_FILE asks for spans, the evaluation is the parent of its API calls
+        self._tracer = start_trace(
+            'lookup dcostakos.doppler.doppler_secrets',
+            {'ansible.host': (variables or {}).get('inventory_hostname')}
+        )
+        try:
+            ret = self._lookup(terms, variables, **kwargs)
+        except Exception as e:
+            if self._tracer is not None:
+                self._tracer.finish(error=e)
+            raise
+        if self._tracer is not None:
+            self._tracer.finish(attributes={'doppler.values': len(ret)})
+        return ret
+
+    def _lookup(self, terms=None, variables=None, **kwargs):
         self._display = Display()
-        if not HAS_REQUESTS:
-            raise AnsibleError(
-                """doppler_secrets needs the python requests library to be installed"""
-            )
 
-        self.set_options(var_options=variables, direct=kwargs)
+        with phase('options'):
+            self.set_options(var_options=variables, direct=kwargs)
+        self._host = (variables or {}).get('inventory_hostname')
         params = {}
-        for param in ['project', 'config', 'url', 'name', 'token']:
+        for param in ['project', 'config', 'url', 'token']:
             params[param] = self.get_option_with_fallback(param)
-        self._display.vvv(f"Lookup params: {params}")
+        self._display.vvv(f"Lookup params: {dict(params, token='********')}")
         self.validate(params)
-        return [self.secret_lookup(params)]
+        error = rate_limit_error(self.get_option('rate_limit'), self.get_option('rate_limit_burst'))
+        if error:
+            raise AnsibleError(error)
+
+        names = terms or [self.get_option_with_fallback('name')]
+        if not all(names):
+            raise DopplerException("Unable to find configuration item name, cannot proceed")
+
+        secrets = self.cached_secrets_lookup(params, names)
+        default = self.get_option('default')
+        if is_not_found(secrets):
+            if default is None:
+                raise DopplerException(secrets[NOT_FOUND])
+            return [default for name in names]
+
+        ret = []
+        for name in names:
+            if name in secrets:
+                ret.append(secrets[name]['computed'])
+            elif default is not None:
+                ret.append(default)
+            else:
+                self.handle_missing(name, params)
+        return ret
 
-    def secret_lookup(self, params):
-        url = f"{params['url']}/configs/config/secret"
+    def cached_secrets_lookup(self, params, names):
+        ttl = self.get_option('cache_ttl')
+        if ttl <= 0:
+            return self.secrets_lookup(params)
+        # a miss is only trusted for the shorter negative ttl, the secret or config may exist by now
+        negative_ttl = min(ttl, self.get_option('negative_cache_ttl'))
+
+        key = cache_key(params['url'], params['token'], params['project'], params['config'])
+        secrets = CACHE.get(key, ttl)
+        if secrets is not None and is_miss(secrets, names) and CACHE.age(key) >= negative_ttl:
+            secrets = None
+        if secrets is None:
+            if self.get_option('shared_cache'):
+                secrets = self.shared_secrets_lookup(key, params, ttl, names, negative_ttl)
+            else:
+                secrets = self.secrets_lookup(params)
+            CACHE.put(key, secrets, self.get_option('cache_max_entries'))
+        self._display.vvv(f"Doppler lookup cache: {CACHE.stats()}")
+        return secrets
+
+    def shared_secrets_lookup(self, key, params, ttl, names, negative_ttl):
+        if not HAS_CRYPTOGRAPHY:
+            raise AnsibleError("doppler_secrets shared_cache needs the python cryptography library to be installed")
+        if not HAS_FCNTL:
+            raise AnsibleError("doppler_secrets shared_cache is not supported on this platform")
+
+        shared = SharedSecretsCache(self.get_option('shared_cache_dir'))
+        fetch = functools.partial(self.secrets_lookup, params)
+        secrets = shared.get_or_fetch(key, params['token'], ttl, fetch)
+        if is_miss(secrets, names):
+            secrets = shared.get_or_fetch(key, params['token'], ttl, fetch, max_age=negative_ttl)
+        self._display.vvv(f"Doppler shared lookup cache: {shared.stats()}")
+        return secrets
+
+    def secrets_lookup(self, params):
+        client = DopplerClient(
+            params['url'],
+            params['token'],
+            timeout=self.get_option('timeout'),
+            max_retries=self.get_option('max_retries'),
+            retry_backoff=self.get_option('retry_backoff'),
+            retry_max_delay=self.get_option('retry_max_delay'),
+            retry_budget=self.get_option('retry_budget'),
+            rate_limit=self.get_option('rate_limit'),
+            rate_limit_burst=self.get_option('rate_limit_burst'),
+            rate_limit_file=self.get_option('rate_limit_file'),
+            http_backend=self.get_option('http_backend')
+        )
+        client.tracer = self._tracer
         req_params = {
             "project": params['project'],
-            "config": params['config'],
-            "name": params['name']
-        }
-        req_headers = {
-            "Accept": "application/json",
-            "Authorization": f"Bearer {params['token']}"
+            "config": params['config']
         }
-        response = requests.get(url, params=req_params, headers=req_headers,
-                                timeout=self.get_option('timeout'))
+        try:
+            response = client.get("/configs/config/secrets", params=req_params)
+        finally:
+            # handed to the doppler_metrics callback, when it is enabled
+            spool_metrics(client.metrics.summary(), host=self._host)
         self._display.vvv(
-            f"Response: {response.status_code} {response.json} w params {req_params}"
+            f"Response: {response.status_code} w params {req_params} after {client.retries} retries"
         )
+        self._display.vvv(f"doppler_metrics: {client.metrics.summary()}")
 
+        msg = f"Failed to lookup secrets in {req_params} - {response.status_code} {response.text}"
+        if response.status_code == 404:
+            # cached like a hit, see negative_cache_ttl
+            return not_found(msg)
         if response.status_code != 200:
-            raise DopplerException(
-                f"Failed to lookup secret {params} - {response.status_code} {response.text}"
-            )
+            raise DopplerException(msg)
+
+        return response.json()['secrets']
 
-        return response.json()['value']['computed']
+    def handle_missing(self, name, params):
+        msg = f"Secret {name} not found in project {params['project']} config {params['config']}"
+        on_missing = self.get_option('on_missing')
+        if on_missing == 'error':
+            raise DopplerException(msg)
+        elif on_missing == 'warn':
+            self._display.warning(f"{msg}, skipping")
 
     def get_option_with_fallback(self, name, env_var=None):
         if name is None:
@@ -141,11 +444,11 @@ class LookupModule(LookupBase):
             self._display.vvv(f"Param {name} not avaible,default to env variable")
             if env_var is None:
                 env_var = f"DOPPLER_{name.upper()}"
-            val = os.environ(env_var)
+            val = os.environ.get(env_var)
             return val
 
     def validate(self, params):
-        for param in ['project', 'config', 'name', 'token', 'url']:
+        for param in ['project', 'config', 'token', 'url']:
             if not params[param]:
                 raise DopplerException(f"Unable to find configuration item {param}, cannot proceed")
         return True
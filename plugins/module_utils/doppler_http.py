@@ -0,0 +1,210 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import base64
+import http.client
+import json
+import ssl
+import threading
+
+from urllib.parse import unquote, urlencode, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import phase
+
+
+# methods that leave the server in the same state however often they are sent
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+class DopplerConnectionError(Exception):
+    pass
+
+
+class DopplerRequest(object):
+    def __init__(self, url, method, body):
+        self.url = url
+        self.method = method
+        self.body = body
+
+
+class DopplerHeaders(dict):
+    """Case insensitive response headers, like the ones requests hands out."""
+
+    def __init__(self, headers):
+        super(DopplerHeaders, self).__init__((k.lower(), v) for k, v in (headers or {}).items())
+
+    def __getitem__(self, key):
+        return super(DopplerHeaders, self).__getitem__(key.lower())
+
+    def __contains__(self, key):
+        return super(DopplerHeaders, self).__contains__(key.lower())
+
+    def get(self, key, default=None):
+        return super(DopplerHeaders, self).get(key.lower(), default)
+
+
+class DopplerResponse(object):
+    """Just enough of requests.Response for the modules and the lookup."""
+
+    def __init__(self, status_code, headers, text, url, method, body=None):
+        self.status_code = status_code
+        self.headers = DopplerHeaders(headers)
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.request = DopplerRequest(url, method, body)
+
+    def json(self):
+        with phase('json_decode'):
+            return json.loads(self.text)
+
+
+class HTTPSession(object):
+    """Keep-alive HTTP/1.1 session on top of http.client.
+
+    Idle connections are pooled per host and handed to one request at a time,
+    so threads fanning out over one session each get a warm socket. Proxies
+    from the usual environment variables are honoured, https goes through a
+    CONNECT tunnel that stays open like any other connection.
+    """
+
+    def __init__(self, validate_certs=True, pool_maxsize=10, headers=None):
+        self.pool_maxsize = pool_maxsize
+        self.headers = dict(headers or {})
+        self.validate_certs = validate_certs
+        self._context = None
+        self._proxies = getproxies()
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, json=None, timeout=None, headers=None):
+        if params:
+            query = urlencode({k: v for k, v in params.items() if v is not None})
+            url = f"{url}{'&' if '?' in url else '?'}{query}"
+
+        request_headers = dict(self.headers)
+        request_headers.update(headers or {})
+        body = None
+        if json is not None:
+            body = _json_dumps(json)
+            request_headers['Content-Type'] = 'application/json'
+
+        parts = urlsplit(url)
+        proxy = self._proxy(parts)
+        target = parts.path or '/'
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        if proxy is not None and parts.scheme == 'http':
+            # plain http is not tunnelled, the proxy wants the absolute URL
+            target = url
+            request_headers.update(_proxy_headers(proxy))
+        key = (parts.scheme, parts.hostname, parts.port, proxy.netloc if proxy else None)
+
+        # a pooled socket may have been closed by the server while idle, such a
+        # failure is retried on the next connection, at worst a fresh one
+        while True:
+            conn, reused = self._checkout(key, proxy, timeout)
+            sent = False
+            try:
+                conn.request(method, target, body=body, headers=request_headers)
+                sent = True
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if reused and _stale(e, sent, method):
+                    continue
+                raise DopplerConnectionError(f"{method} {url} failed: {e}")
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+
+        return DopplerResponse(
+            response.status,
+            dict(response.getheaders()),
+            data.decode('utf-8', errors='replace'),
+            url,
+            method,
+            body.decode('utf-8') if body is not None else None
+        )
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _checkout(self, key, proxy, timeout):
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                conn = conns.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+        scheme, host, port = key[:3]
+        if proxy is None:
+            if scheme == 'https':
+                return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context()), False
+            return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 80, timeout=timeout, context=self._ssl_context())
+            conn.set_tunnel(host, port or 443, headers=_proxy_headers(proxy))
+            return conn, False
+        return http.client.HTTPConnection(proxy.hostname, proxy.port or 80, timeout=timeout), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.pool_maxsize:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def _ssl_context(self):
+        if self._context is None:
+            context = ssl.create_default_context()
+            if not self.validate_certs:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self._context = context
+        return self._context
+
+    def _proxy(self, parts):
+        proxy = self._proxies.get(parts.scheme)
+        if not proxy or proxy_bypass(parts.hostname):
+            return None
+        return urlsplit(proxy if '://' in proxy else f"http://{proxy}")
+
+
+def _stale(error, sent, method):
+    # Only a socket the server closed while it sat idle is safe to replay: the
+    # send failed, or the server hung up without a single byte of response.
+    # A hang up after the request went out may also mean the server read and
+    # applied it, so that is only replayed for idempotent methods. Anything
+    # else, above all a timeout, is left to the retry rules of the client.
+    if isinstance(error, TimeoutError):
+        return False
+    if not sent:
+        return isinstance(error, (BrokenPipeError, ConnectionResetError, ConnectionAbortedError))
+    return method in IDEMPOTENT_METHODS and isinstance(error, http.client.RemoteDisconnected)
+
+
+def _proxy_headers(proxy):
+    if proxy.username is None:
+        return {}
+    credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+    return {'Proxy-Authorization': f"Basic {base64.b64encode(credentials.encode('utf-8')).decode('ascii')}"}
+
+
+def _json_dumps(data):
+    return json.dumps(data).encode('utf-8')
@@ -0,0 +1,125 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import fnmatch
+import json
+import os
+import tempfile
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
+)
+
+# the largest page the list endpoints hand out
+PER_PAGE = 100
+
+
+class Paginator(object):
+    """Walk a page/per_page list endpoint, yielding items as pages arrive.
+
+    Only one page is held at a time. Endpoints that ignore paging answer
+    every page with the same items, the walk stops when a page repeats.
+    """
+
+    def __init__(self, client, path, key, params=None, per_page=PER_PAGE):
+        self.client = client
+        self.path = path
+        self.key = key
+        self.params = dict(params or {})
+        self.per_page = per_page
+        self.pages = 0
+        # first response, for the req and status_code echoed back to the user
+        self.response = None
+
+    def __iter__(self):
+        page = 1
+        previous = None
+        while True:
+            params = dict(self.params, page=page, per_page=self.per_page)
+            response = self.client.get(self.path, params=params)
+            if response.status_code != 200:
+                raise DopplerException(
+                    f"Unexpected REST failure {response.text} - url: {response.request.url}, method: {response.request.method}"
+                )
+            if self.response is None:
+                self.response = response
+            self.pages += 1
+
+            items = response.json().get(self.key) or []
+            if not items or items[:1] == previous:
+                return
+            previous = items[:1]
+            for item in items:
+                yield item
+
+            if len(items) < self.per_page:
+                return
+            page += 1
+
+
+def select(items, filters=None, limit=None, fields=None):
+    # stops pulling items once limit is reached, so later pages are never fetched
+    count = 0
+    for item in items:
+        if filters and not all(fnmatch.fnmatchcase(str(item.get(k)), str(v)) for k, v in filters.items()):
+            continue
+        if fields:
+            item = {k: item[k] for k in fields if k in item}
+        yield item
+        count += 1
+        if limit is not None and count >= limit:
+            return
+
+
+def write_ndjson(module, dest, items):
+    # written next to dest and moved into place, so readers never see half a file
+    fd, tmp = tempfile.mkstemp(prefix='.doppler-', dir=os.path.dirname(os.path.abspath(dest)))
+    count = 0
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for item in items:
+                f.write(json.dumps(item, sort_keys=True))
+                f.write('\n')
+                count += 1
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+    if os.path.exists(dest) and module.sha1(dest) == module.sha1(tmp):
+        os.remove(tmp)
+        return count, False
+    module.atomic_move(tmp, dest)
+    return count, True
+
+
+def list_params_error(params):
+    """Why per_page or limit can't page through a list, None when they can."""
+    if params.get('per_page') is not None and params['per_page'] < 1:
+        return f"per_page must be at least 1, got {params['per_page']}"
+    if params.get('limit') is not None and params['limit'] < 1:
+        return f"limit must be at least 1, got {params['limit']}"
+    return None
+
+
+def list_result(module, pages):
+    """Aggregate the items of a Paginator, or stream them to dest as NDJSON."""
+    filters = module.params.get('filters')
+    limit = module.params.get('limit')
+    if limit is not None and not filters:
+        pages.per_page = min(pages.per_page, limit)
+    items = select(pages, filters, limit, module.params.get('fields'))
+
+    dest = module.params.get('dest')
+    if dest:
+        count, changed = write_ndjson(module, dest, items)
+        result = dict(changed=changed, dest=dest, count=count)
+    else:
+        items = list(items)
+        result = {'changed': False, pages.key: items, 'count': len(items)}
+
+    if module.params.get('return_request', True):
+        result['req'] = module._req_to_string(pages.response.request)
+        result['status_code'] = pages.response.status_code
+    return result
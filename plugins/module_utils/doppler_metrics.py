@@ -0,0 +1,84 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+import threading
+
+# path segments that identify one object rather than an endpoint
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$')
+
+
+def endpoint_template(method, path):
+    # Doppler passes ids as query parameters, but keep the key stable if a path ever carries one
+    path = path.split('?', 1)[0]
+    return f"{method} {'/'.join('{id}' if ID_SEGMENT.match(s) else s for s in path.split('/'))}"
+
+
+def is_error(status):
+    # a 404 is how the modules find out an object does not exist yet, not a failure
+    return status is None or (status >= 400 and status != 404)
+
+
+# upper bounds of the latency histogram, the same for every endpoint so the
+# histograms of many tasks and hosts can be added up
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+OVERFLOW_BUCKET = '+Inf'
+
+
+def latency_bucket(latency_ms):
+    for bound in LATENCY_BUCKETS_MS:
+        if latency_ms <= bound:
+            return str(bound)
+    return OVERFLOW_BUCKET
+
+
+def new_endpoint():
+    return dict(calls=0, errors=0, retries=0, bytes=0, status={}, time_ms=0.0, max_ms=0.0, latency_buckets={})
+
+
+class CallMetrics(object):
+    """Per endpoint totals of the API calls a client made.
+
+    Every call, after retries, adds to its endpoint: final status (None
+    when the API could not be reached), latency including retries and rate
+    limit waits, retries and response bytes. Latencies are kept as a sum,
+    a maximum and a histogram, so the summary has the same size however
+    many calls were made.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, path, status, elapsed, retries=0, size=0):
+        latency_ms = elapsed * 1000
+        key = str(status) if status is not None else 'error'
+        bucket = latency_bucket(latency_ms)
+        with self._lock:
+            entry = self.endpoints.setdefault(endpoint_template(method, path), new_endpoint())
+            entry['calls'] += 1
+            entry['errors'] += int(is_error(status))
+            entry['retries'] += retries
+            entry['bytes'] += size
+            entry['status'][key] = entry['status'].get(key, 0) + 1
+            entry['time_ms'] += latency_ms
+            entry['max_ms'] = max(entry['max_ms'], latency_ms)
+            entry['latency_buckets'][bucket] = entry['latency_buckets'].get(bucket, 0) + 1
+
+    def summary(self):
+        """Compact per endpoint totals, the shape returned as doppler_metrics."""
+        total = dict(calls=0, errors=0, retries=0, bytes=0, time_ms=0.0)
+        endpoints = {}
+        with self._lock:
+            for name, entry in self.endpoints.items():
+                entry = dict(entry, status=dict(entry['status']), latency_buckets=dict(entry['latency_buckets']))
+                entry['time_ms'] = round(entry['time_ms'], 2)
+                entry['max_ms'] = round(entry['max_ms'], 2)
+                endpoints[name] = entry
+                for key in total:
+                    total[key] += entry[key]
+        total['time_ms'] = round(total['time_ms'], 2)
+        total['endpoints'] = endpoints
+        return total
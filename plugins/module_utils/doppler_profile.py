@@ -0,0 +1,120 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+
+# DOPPLER_PROFILE=phases writes a per phase timing breakdown of every module
+# run and lookup evaluation, DOPPLER_PROFILE=cprofile adds a pstats file.
+# Files go to DOPPLER_PROFILE_DIR on the host executing the code.
+PROFILE_ENV = 'DOPPLER_PROFILE'
+PROFILE_DIR_ENV = 'DOPPLER_PROFILE_DIR'
+PROFILE_MODES = ('phases', 'cprofile')
+
+# the run being profiled, None when profiling is off
+_current = None
+# tells apart the files of lookups evaluated in the same process and second
+_runs = itertools.count(1)
+
+
+class Phases(object):
+    """Wall time spent in each named phase of one run."""
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, elapsed):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+
+class phase(object):
+    """Time a block as the named phase of the current run, free when profiling is off."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if _current is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if _current is not None and self.start is not None:
+            _current.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def profile_mode():
+    mode = os.environ.get(PROFILE_ENV, '').strip().lower()
+    return mode if mode in PROFILE_MODES else None
+
+
+def profile_dir():
+    return os.path.expanduser(os.environ.get(PROFILE_DIR_ENV) or os.path.join(tempfile.gettempdir(), 'doppler-profile'))
+
+
+def run_profiled(func, name):
+    """Run func, timing its phases and optionally under cProfile, when DOPPLER_PROFILE asks for it."""
+    global _current
+    mode = profile_mode()
+    if mode is None or _current is not None:
+        return func()
+
+    # CPU time used before we got here: interpreter start up, unpacking and imports
+    startup = time.process_time()
+    profiler = None
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+
+    _current = Phases()
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        # modules leave through exit_json, which raises SystemExit
+        return func()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        total = time.perf_counter() - start
+        phases, _current = _current, None
+        _dump(name, mode, startup, total, phases, profiler)
+
+
+def _dump(name, mode, startup, total, phases, profiler):
+    measured = sum(phases.totals.values())
+    report = dict(
+        name=name,
+        mode=mode,
+        pid=os.getpid(),
+        timestamp=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        startup_cpu_s=round(startup, 6),
+        total_s=round(total, 6),
+        phases={k: dict(seconds=round(v, 6), count=phases.counts[k]) for k, v in sorted(phases.totals.items())},
+        other_s=round(max(0.0, total - measured), 6),
+    )
+    # profiling must never change what the module or the lookup returns
+    try:
+        directory = profile_dir()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        base = os.path.join(directory, f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(_runs)}")
+        with open(f"{base}.phases.json", 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        if profiler is not None:
+            profiler.dump_stats(f"{base}.pstats")
+    except OSError:
+        pass
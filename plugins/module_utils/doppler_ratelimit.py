@@ -0,0 +1,93 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+
+def default_state_file(url, token):
+    # one bucket per API endpoint and token, private to the current user
+    digest = hashlib.sha256(f"{url.rstrip('/')}|{token}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"doppler-ratelimit-{os.getuid()}-{digest}")
+
+
+def rate_limit_error(rate, burst=None):
+    """Why rate and burst can't drive a RateLimiter, None when they can; a rate of 0 disables it."""
+    if rate is not None and rate < 0:
+        return f"rate_limit must be a positive number of requests per second, got {rate}"
+    if burst is not None and burst < 1:
+        return f"rate_limit_burst must be at least 1, got {burst}"
+    return None
+
+
+class RateLimiter(object):
+    """Token bucket limiting requests per second across processes.
+
+    The bucket lives in a small state file guarded by flock, so every module
+    or lookup using the same file draws from one budget. Callers reserve a
+    token even when the bucket is empty and sleep until their reservation
+    matures, which keeps a burst of processes evenly spaced instead of
+    retrying in lock step. Without fcntl the bucket is per process.
+    """
+
+    def __init__(self, rate, burst=None, path=None):
+        if rate <= 0:
+            raise ValueError("rate limit must be a positive number of requests per second")
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.rate)
+        self.path = path if HAS_FCNTL else None
+        self.waited = 0.0
+        self._lock = threading.Lock()
+        self._state = None
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            self.waited += delay
+            time.sleep(delay)
+
+    def _reserve(self):
+        if self.path is None:
+            with self._lock:
+                self._state = self._take(self._state)
+                tokens = self._state[0]
+        else:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    state = self._parse(f.read())
+                    tokens, stamp = self._take(state)
+                    f.seek(0)
+                    f.truncate()
+                    f.write(f"{tokens} {stamp}")
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    def _take(self, state):
+        now = time.time()
+        if state is None:
+            tokens = self.burst
+        else:
+            tokens, stamp = state
+            tokens = min(self.burst, tokens + max(0.0, now - stamp) * self.rate)
+        return tokens - 1, now
+
+    def _parse(self, data):
+        try:
+            tokens, stamp = data.split()
+            return float(tokens), float(stamp)
+        except ValueError:
+            return None
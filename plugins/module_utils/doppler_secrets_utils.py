@@ -0,0 +1,140 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import fnmatch
+import json
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
+)
+
+# Doppler maintains these in every config, they can be neither set nor deleted
+RESERVED_SECRETS = ('DOPPLER_PROJECT', 'DOPPLER_ENVIRONMENT', 'DOPPLER_CONFIG')
+
+
+# These helpers raise DopplerException instead of calling fail_json, so they
+# can run on worker threads and let the caller decide how a failure is reported.
+def check_response(response):
+    if response.status_code != 200:
+        raise DopplerException(
+            f"Unexpected REST failure {response.text} - url: {response.request.url}, method: {response.request.method}"
+        )
+    return response.json()
+
+
+def list_secrets(client, project, config, names=None):
+    params = {'project': project, 'config': config}
+    if names:
+        # let Doppler drop everything else before it is sent
+        params['secrets'] = ','.join(names)
+    return check_response(client.get("/configs/config/secrets", params=params))['secrets']
+
+
+def write_secrets(client, project, config, changes, batch_size=500):
+    # every response holds the full config, the last one reflects all chunks
+    for start in range(0, len(changes), batch_size):
+        payload = {
+            "project": project,
+            "config": config,
+            "change_requests": changes[start:start + batch_size]
+        }
+        result = check_response(client.post("/configs/config/secrets", json=payload))
+    return result['secrets']
+
+
+def to_secret_value(value):
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def diff_secrets(current, desired):
+    changes = []
+    status = {}
+    for name, value in desired.items():
+        if value is None:
+            # like name without value, only assert that the secret exists
+            if name not in current:
+                raise DopplerException(f"Secret {name} doesn't exist and can't create with no value")
+            status[name] = 'unchanged'
+            continue
+        value = to_secret_value(value)
+        if name not in current:
+            status[name] = 'created'
+        elif current[name]['raw'] != value:
+            status[name] = 'updated'
+        else:
+            status[name] = 'unchanged'
+            continue
+        changes.append({"name": name, "originalName": name, "value": value})
+    return changes, status
+
+
+def diff_deletes(current, names):
+    changes = []
+    status = {}
+    for name in names:
+        if name in current:
+            status[name] = 'deleted'
+            changes.append({"name": name, "originalName": name, "value": None, "shouldDelete": True})
+        else:
+            status[name] = 'absent'
+    return changes, status
+
+
+def name_filter(include=None, exclude=None, include_regex=None, exclude_regex=None):
+    include = include or []
+    exclude = exclude or []
+    include_regex = [re.compile(r) for r in include_regex or []]
+    exclude_regex = [re.compile(r) for r in exclude_regex or []]
+
+    def match(name):
+        if include or include_regex:
+            if not (any(fnmatch.fnmatchcase(name, p) for p in include)
+                    or any(r.search(name) for r in include_regex)):
+                return False
+        if any(fnmatch.fnmatchcase(name, p) for p in exclude):
+            return False
+        if any(r.search(name) for r in exclude_regex):
+            return False
+        return True
+
+    return match
+
+
+def is_literal(pattern):
+    return not any(c in pattern for c in '*?[')
+
+
+def normalize_targets(targets, default_project):
+    normalized = []
+    for target in targets:
+        if isinstance(target, dict):
+            if not target.get('config'):
+                raise DopplerException(f"Target {target} is missing a config")
+            normalized.append((target.get('project') or default_project, target['config']))
+        else:
+            normalized.append((default_project, str(target)))
+    for project, config in normalized:
+        if not project:
+            raise DopplerException(f"No project given for config {config}")
+    return normalized
+
+
+def fan_out(func, targets, max_workers):
+    # results come back in target order, a failing target does not stop the others
+    def run(target):
+        try:
+            return func(*target)
+        except DopplerException as e:
+            return dict(project=target[0], config=target[1], failed=True, msg=str(e))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as pool:
+        return list(pool.map(run, targets))
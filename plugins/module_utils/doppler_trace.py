@@ -0,0 +1,155 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import json
+import os
+import re
+import threading
+import time
+
+# DOPPLER_TRACE_FILE=/path/traces.json appends the spans of every module run
+# and lookup evaluation to that file, one OTLP/JSON ExportTraceServiceRequest
+# per line, the format read by the OpenTelemetry collector otlpjsonfile receiver.
+TRACE_FILE_ENV = 'DOPPLER_TRACE_FILE'
+# trace to join: a W3C traceparent, or a bare trace id shared by the hosts of a task
+TRACEPARENT_ENV = 'TRACEPARENT'
+TRACE_ID_ENV = 'DOPPLER_TRACE_ID'
+
+TRACEPARENT = re.compile(r'^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+TRACE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def new_id(size):
+    return os.urandom(size).hex()
+
+
+def trace_context():
+    """Trace id and parent span id to start from, the parent is None for a new trace."""
+    match = TRACEPARENT.match(os.environ.get(TRACEPARENT_ENV, '').strip().lower())
+    if match and int(match.group(1), 16) and int(match.group(2), 16):
+        return match.group(1), match.group(2)
+    trace_id = os.environ.get(TRACE_ID_ENV, '').strip().lower().replace('-', '')
+    if TRACE_ID.match(trace_id) and int(trace_id, 16):
+        return trace_id, None
+    return new_id(16), None
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return dict(key=key, value=dict(boolValue=value))
+    if isinstance(value, int):
+        # OTLP/JSON carries 64 bit integers as strings
+        return dict(key=key, value=dict(intValue=str(value)))
+    if isinstance(value, float):
+        return dict(key=key, value=dict(doubleValue=value))
+    return dict(key=key, value=dict(stringValue=str(value)))
+
+
+class Span(object):
+    def __init__(self, name, trace_id, parent_id=None, kind=SPAN_KIND_INTERNAL, start=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start = start or time.time_ns()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.status = None
+
+    def finish(self, error=None, end=None):
+        self.end = end or time.time_ns()
+        self.status = dict(code=STATUS_ERROR, message=str(error)) if error else dict(code=STATUS_OK)
+
+    def to_otlp(self):
+        span = dict(
+            traceId=self.trace_id,
+            spanId=self.span_id,
+            name=self.name,
+            kind=self.kind,
+            startTimeUnixNano=str(self.start),
+            endTimeUnixNano=str(self.end or time.time_ns()),
+            attributes=[_attribute(k, v) for k, v in sorted(self.attributes.items()) if v is not None],
+            status=self.status or dict(code=STATUS_OK),
+        )
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class Tracer(object):
+    """Spans of one module run or lookup evaluation, written to a local file.
+
+    The run is the parent span and every API call made by its client is a
+    client span below it. Nothing leaves the host, the file is the only sink.
+    """
+
+    def __init__(self, name, path, attributes=None):
+        self.path = path
+        self.trace_id, parent_id = trace_context()
+        self.root = Span(name, self.trace_id, parent_id=parent_id, attributes=attributes)
+        self.spans = [self.root]
+        self._lock = threading.Lock()
+        self._written = False
+
+    def call(self, method, endpoint, url, start, status, retries=0, size=0, error=None):
+        span = Span(
+            endpoint, self.trace_id, parent_id=self.root.span_id, kind=SPAN_KIND_CLIENT, start=start,
+            attributes={
+                'http.request.method': method,
+                'http.route': endpoint.split(' ', 1)[-1],
+                'url.full': url,
+                'http.response.status_code': status,
+                'http.response.body.size': size,
+                'doppler.retries': retries,
+            }
+        )
+        if error is None and (status is None or status >= 500):
+            error = f"HTTP {status}" if status else 'no response'
+        span.finish(error)
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self, error=None, attributes=None):
+        """End the run span and append the trace to the file, once."""
+        if self._written:
+            return
+        self._written = True
+        self.root.attributes.update(attributes or {})
+        self.root.finish(error)
+        request = dict(resourceSpans=[dict(
+            resource=dict(attributes=[
+                _attribute('service.name', 'dcostakos.doppler'),
+                _attribute('process.pid', os.getpid()),
+            ]),
+            scopeSpans=[dict(
+                scope=dict(name='dcostakos.doppler'),
+                spans=[span.to_otlp() for span in self.spans],
+            )],
+        )])
+        # tracing is best effort, it must never fail the run it describes
+        line = (json.dumps(request, separators=(',', ':')) + '\n').encode('utf-8')
+        try:
+            # one append per run, so runs of concurrent forks never interleave
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+
+def start_trace(name, attributes=None):
+    """A Tracer for this run when DOPPLER_TRACE_FILE is set, otherwise None."""
+    path = os.environ.get(TRACE_FILE_ENV)
+    if not path:
+        return None
+    return Tracer(name, os.path.expanduser(path), attributes)
@@ -5,14 +5,246 @@
 
 import os
 import copy
-import requests
+import random
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+
+from ansible.module_utils.basic import AnsibleModule, env_fallback, missing_required_lib
+from ansible.module_utils.connection import Connection, ConnectionError as RPCConnectionError
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_http import (
+    IDEMPOTENT_METHODS,
+    DopplerConnectionError,
+    DopplerResponse,
+    HTTPSession,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_metrics import CallMetrics, endpoint_template
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import phase
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_ratelimit import (
+    RateLimiter,
+    default_state_file,
+    rate_limit_error,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_trace import start_trace
+
+# A module invocation talks to a single API host, so one pool is enough;
+# maxsize bounds how many sockets may be kept warm for concurrent callers.
+POOL_CONNECTIONS = 1
+POOL_MAXSIZE = 10
+
+# responses worth another attempt: rate limiting and transient server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Methods other than IDEMPOTENT_METHODS, the creates and writes sent as POST,
+# are only retried on answers saying the request was not processed.
+NOT_PROCESSED_STATUS_CODES = (429, 503)
+
+HTTP_BACKENDS = ('builtin', 'requests')
+
+
+def import_requests():
+    # requests is optional and slow to import, only load it when asked for
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        raise DopplerException(missing_required_lib('requests'))
+    return requests, HTTPAdapter
 
-from ansible.module_utils.basic import AnsibleModule, env_fallback
 
 class DopplerException(Exception):
     pass
 
 
+class DopplerClient(object):
+    """Thin wrapper around a keep-alive HTTP session for the Doppler API.
+
+    Every call made through one client reuses the same connection pool, so
+    only the first request of an invocation pays for the TCP/TLS handshake.
+    The session is built on http.client unless the requests backend is asked for.
+    """
+
+    def __init__(self, url, token, timeout=5, validate_certs=True,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 max_retries=3, retry_backoff=1.0, retry_max_delay=30.0, retry_budget=10,
+                 rate_limit=None, rate_limit_burst=None, rate_limit_file=None, http_backend='builtin'):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.validate_certs = validate_certs
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_max_delay = retry_max_delay
+        # retries left for the whole invocation, shared by every call
+        self.retry_budget = retry_budget
+        self.retries = 0
+        self.http_backend = http_backend
+        self.metrics = CallMetrics()
+        # set by the owner of the client when DOPPLER_TRACE_FILE asks for spans
+        self.tracer = None
+        self._lock = threading.Lock()
+
+        self.rate_limiter = None
+        if rate_limit:
+            self.rate_limiter = RateLimiter(
+                rate_limit,
+                burst=rate_limit_burst,
+                path=rate_limit_file or default_state_file(url, token or '')
+            )
+
+        self._open(token, pool_connections, pool_maxsize)
+
+    def _open(self, token, pool_connections, pool_maxsize):
+        headers = {
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        }
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+
+        if self.http_backend == 'requests':
+            requests, HTTPAdapter = import_requests()
+            # a timeout is not a ConnectionError, but just as much a call without a response
+            self.transport_errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+            self.session.verify = self.validate_certs
+            self.session.headers.update(headers)
+        else:
+            self.transport_errors = (DopplerConnectionError,)
+            self.session = HTTPSession(
+                validate_certs=self.validate_certs,
+                pool_maxsize=pool_maxsize,
+                headers=headers
+            )
+
+    def request(self, method, path, params=None, json=None):
+        with phase('http'):
+            return self._request(method, path, params, json)
+
+    def _request(self, method, path, params, json):
+        started_at = time.time_ns()
+        start = time.perf_counter()
+        attempt = 0
+        response = None
+        try:
+            while True:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                try:
+                    response = self._send(method, path, params, json)
+                except self.transport_errors as e:
+                    response = None
+                    # the request may have reached the server, only replay what is safe to send twice
+                    if method not in IDEMPOTENT_METHODS or not self._can_retry(attempt):
+                        raise DopplerException(f"Unable to reach Doppler at {self.url}: {e}")
+                    delay = self._backoff(attempt)
+                else:
+                    if not self._retryable(method, response.status_code) or not self._can_retry(attempt):
+                        return response
+                    delay = self._server_delay(response)
+                    if delay is None:
+                        delay = self._backoff(attempt)
+                    elif delay > self.retry_max_delay:
+                        # the server wants us gone for longer than we are willing to wait
+                        return response
+
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                    self.retry_budget -= 1
+                time.sleep(delay)
+        finally:
+            status = response.status_code if response is not None else None
+            size = len(response.content) if response is not None else 0
+            self.metrics.record(method, path, status, time.perf_counter() - start, retries=attempt, size=size)
+            if self.tracer is not None:
+                self.tracer.call(
+                    method, endpoint_template(method, path), f"{self.url}{path}", started_at, status,
+                    retries=attempt, size=size
+                )
+
+    def _send(self, method, path, params, json):
+        return self.session.request(
+            method,
+            f"{self.url}{path}",
+            params=params,
+            json=json,
+            timeout=self.timeout
+        )
+
+    def _retryable(self, method, status_code):
+        if method in IDEMPOTENT_METHODS:
+            return status_code in RETRY_STATUS_CODES
+        return status_code in NOT_PROCESSED_STATUS_CODES
+
+    def _can_retry(self, attempt):
+        return attempt < self.max_retries and self.retry_budget > 0
+
+    def _backoff(self, attempt):
+        # capped exponential backoff with full jitter
+        return random.uniform(0, min(self.retry_max_delay, self.retry_backoff * (2 ** attempt)))
+
+    def _server_delay(self, response):
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            try:
+                return max(0.0, float(response.headers['X-RateLimit-Reset']) - time.time())
+            except (KeyError, ValueError):
+                pass
+
+        return None
+
+    def get(self, path, params=None):
+        return self.request('GET', path, params=params)
+
+    def post(self, path, json=None, params=None):
+        return self.request('POST', path, params=params, json=json)
+
+    def delete(self, path, json=None, params=None):
+        return self.request('DELETE', path, params=params, json=json)
+
+    def close(self):
+        self.session.close()
+
+
+class DopplerConnectionClient(DopplerClient):
+    """DopplerClient sending its requests through the dcostakos.doppler.doppler httpapi plugin.
+
+    The session lives in the persistent connection process, so it stays warm
+    across every task of the play. Retries and rate limiting still happen here.
+    """
+
+    transport_errors = (RPCConnectionError,)
+
+    def __init__(self, connection, url, token, **kwargs):
+        self.connection = connection
+        super(DopplerConnectionClient, self).__init__(url, token, **kwargs)
+
+    def _open(self, token, pool_connections, pool_maxsize):
+        # the token travels with each request, the connection may also have its own
+        self.token = token
+
+    def _send(self, method, path, params, json):
+        return DopplerResponse(**self.connection.send_doppler_request(
+            method, path, params=params, json=json, token=self.token, timeout=self.timeout
+        ))
+
+    def close(self):
+        pass
+
+
 class DopplerModule(AnsibleModule):
     def __init__(self, *args, **kwargs):
         arg_spec = kwargs.get('argument_spec', {})
@@ -25,17 +257,98 @@ class DopplerModule(AnsibleModule):
                 timeout=dict(type='int', default=5),
                 token=dict(type='str', fallback=(env_fallback, ['DOOPLER_TOKEN'])),
                 project=dict(type='str', fallback=(env_fallback, ['DOPPLER_PROJECT'])),
-                config=dict(type='str', fallback=(env_fallback, ['DOPPLER_CONFIG']))
+                config=dict(type='str', fallback=(env_fallback, ['DOPPLER_CONFIG'])),
+                max_retries=dict(type='int', fallback=(env_fallback, ['DOPPLER_MAX_RETRIES']), default=3),
+                retry_backoff=dict(type='float', default=1.0),
+                retry_max_delay=dict(type='float', default=30.0),
+                retry_budget=dict(type='int', fallback=(env_fallback, ['DOPPLER_RETRY_BUDGET']), default=10),
+                rate_limit=dict(type='float', fallback=(env_fallback, ['DOPPLER_RATE_LIMIT'])),
+                rate_limit_burst=dict(type='int'),
+                rate_limit_file=dict(type='path', fallback=(env_fallback, ['DOPPLER_RATE_LIMIT_FILE'])),
+                http_backend=dict(type='str', fallback=(env_fallback, ['DOPPLER_HTTP_BACKEND']),
+                                  default='builtin', choices=list(HTTP_BACKENDS)),
             )
 
         )
 
-        AnsibleModule.__init__(self, *args, **kwargs)
+        # the run span covers argument parsing too, it is named once the module knows its name
+        self.tracer = start_trace('doppler module')
+        with phase('argument_spec'):
+            AnsibleModule.__init__(self, *args, **kwargs)
+        if self.tracer is not None:
+            self.tracer.root.name = self._name
+            self.tracer.root.attributes.update({
+                'ansible.module': self._name,
+                'ansible.check_mode': self.check_mode,
+            })
+
+        error = rate_limit_error(self.params['rate_limit'], self.params['rate_limit_burst'])
+        if error:
+            self.fail_json(msg=error)
+
+        client_args = dict(
+            timeout=self.params['timeout'],
+            validate_certs=self.params['validate_certs'],
+            max_retries=self.params['max_retries'],
+            retry_backoff=self.params['retry_backoff'],
+            retry_max_delay=self.params['retry_max_delay'],
+            retry_budget=self.params['retry_budget'],
+            rate_limit=self.params['rate_limit'],
+            rate_limit_burst=self.params['rate_limit_burst'],
+            rate_limit_file=self.params['rate_limit_file']
+        )
+
+        with phase('client_setup'):
+            self._open_client(client_args)
+        self.client.tracer = self.tracer
+
+    def _open_client(self, client_args):
+        if self._socket_path:
+            # running under the dcostakos.doppler.doppler httpapi connection
+            self.client = DopplerConnectionClient(
+                Connection(self._socket_path),
+                self.params['url'],
+                self.params['token'],
+                **client_args
+            )
+            return
 
-    def raise_for_status(self, response):
         try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError:
+            self.client = DopplerClient(
+                self.params['url'],
+                self.params['token'],
+                # modules fanning out over threads need a warm socket per worker
+                pool_maxsize=max(POOL_MAXSIZE, self.params.get('max_workers') or 0),
+                http_backend=self.params['http_backend'],
+                **client_args
+            )
+        except DopplerException as e:
+            self.fail_json(msg=str(e))
+
+    def exit_json(self, **kwargs):
+        self._add_client_stats(kwargs)
+        self._finish_trace(attributes={'ansible.changed': bool(kwargs.get('changed'))})
+        with phase('exit_json'):
+            AnsibleModule.exit_json(self, **kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        self._add_client_stats(kwargs)
+        self._finish_trace(error=msg)
+        with phase('exit_json'):
+            AnsibleModule.fail_json(self, msg, **kwargs)
+
+    def _finish_trace(self, error=None, attributes=None):
+        tracer = getattr(self, 'tracer', None)
+        if tracer is not None:
+            tracer.finish(error, attributes)
+
+    def _add_client_stats(self, result):
+        client = getattr(self, 'client', None)
+        if client is not None:
+            result.setdefault('doppler_metrics', client.metrics.summary())
+
+    def raise_for_status(self, response):
+        if response.status_code >= 400:
             self.fail_json(
                 msg=f"Doppler returned error {response.json()}",
                 request={
@@ -61,6 +61,15 @@ options:
     - present
     type: str
     required: false
+  list:
+    description:
+    - List every config of the environment in I(project) instead of managing one
+    - Every page is fetched, see I(per_page)
+    type: bool
+    default: false
+extends_documentation_fragment:
+- dcostakos.doppler.doppler
+- dcostakos.doppler.doppler.list
 '''
 
 EXAMPLES = r'''
@@ -72,6 +81,30 @@ EXAMPLES = r'''
     token: my_token
   register: config
 
+- name: list only the names of the first ten production configs, without the request echo
+  dcostakos.doppler.doppler_config:
+    project: 'ansible-project'
+    environment: 'prd'
+    list: true
+    filters:
+      name: 'prd_*'
+    fields:
+    - name
+    limit: 10
+    return_request: false
+    token: my_token
+  register: configs
+
+- name: list the locked configs of the prd environment
+  dcostakos.doppler.doppler_config:
+    project: 'ansible-project'
+    environment: 'prd'
+    list: true
+    filters:
+      locked: 'True'
+    token: my_token
+  register: locked_configs
+
 - name: Create ci_config config in ci environment in ansible-project
   dcostakos.doppler.doppler_config:
     project: 'ansible-project'
@@ -97,14 +130,36 @@ changed:
   returned: success
   type: bool
   sample: true
+doppler_metrics:
+  description:
+  - Summary of the API calls made by this task, per endpoint
+  - Same keys as the C(doppler_metrics) returned by M(dcostakos.doppler.doppler_secrets)
+  returned: always
+  type: dict
+  sample:
+    calls: 1
+    errors: 0
+    retries: 0
+    bytes: 287
+    time_ms: 19.6
+    endpoints:
+      GET /configs/config:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 287
+        status: {"200": 1}
+        time_ms: 19.6
+        max_ms: 19.6
+        latency_buckets: {"25": 1}
 req:
   description: details about the request that was made to dopplers' api
-  returned: success
+  returned: when return_request is true
   type: str
 status_code:
   description: The HTTP status code of the request
   type: int
-  returned: success
+  returned: when return_request is true
 config:
   description: Representation of the config object
   type: dict
@@ -155,16 +210,37 @@ config:
       description: Unique ID for this config item
       type: str
       sample: 0e3540b4-5bd2-4faa-8838-1349ad315fb4
+count:
+  description: Number of items listed
+  returned: when list is true
+  type: int
+  sample: 2
+dest:
+  description: File the items were written to
+  returned: when list is true and dest is set
+  type: str
+  sample: /tmp/configs.ndjson
+configs:
+  description: Every item of every page, as returned by the API
+  returned: when list is true and dest is not set
+  type: list
+  elements: dict
 '''
 
 # imports
-import requests
 import re
 
 from ansible.module_utils.basic import env_fallback
 from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
     DopplerModule,
 )
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import run_profiled
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_list_utils import (
+    Paginator,
+    list_params_error,
+    list_result,
+)
 
 def toSnakeCase(string):
     string = re.sub(r'(?<=[a-z])(?=[A-Z])|[^a-zA-Z]', ' ', string).strip().replace(' ', '_')
@@ -176,53 +252,30 @@ def get_url_params(module):
         'environment': module.params['environment']
     }
 
-def get_headers(module):
-    return {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {module.params['token']}"
-    }
-
 def list_configs(module):
-    params = get_url_params(module)
-    return return_if_object(
-        module,
-        requests.get(
-            f"{module.params['url']}/configs",
-            headers=get_headers(module),
-            params=params,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
-    )
+    return list_result(module, Paginator(
+        module.client,
+        "/configs",
+        "configs",
+        params=get_url_params(module),
+        per_page=module.params['per_page']
+    ))
 
 def get_config(module):
     params = get_url_params(module)
     params['config'] = module.params['name']
     return return_if_object(
         module,
-        requests.get(
-            f"{module.params['url']}/configs/config",
-            headers=get_headers(module),
-            params=params,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        ),
+        module.client.get("/configs/config", params=params),
         allow_not_found=True
     )
 
 def create_config(module):
     params = get_url_params(module)
     params['name'] = module.params['name']
-    headers = get_headers(module)
-    headers['content-type'] = "application/json"
     return return_if_object(
         module,
-        requests.post(
-            f"{module.params['url']}/configs",
-            headers=headers, json=params,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
+        module.client.post("/configs", json=params)
     )
 
 def delete_config(module):
@@ -230,16 +283,9 @@ def delete_config(module):
         'project': module.params['project'],
         'config': module.params['name']
     }
-    headers = get_headers(module)
-    headers['content-type'] = "application/json"
     return return_if_object(
         module,
-        requests.delete(
-            f"{module.params['url']}/configs/config",
-            headers=headers, json=payload,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
+        module.client.delete("/configs/config", json=payload)
     )
 
 def return_if_object(module, response, allow_not_found=False):
@@ -251,8 +297,9 @@ def return_if_object(module, response, allow_not_found=False):
         result = response.json()
         if result.get('value') and result.get('value').get('raw') is None:
             return None
-        result['req'] = module._req_to_string(response.request)
-        result['status_code'] = response.status_code
+        if module.params['return_request']:
+            result['req'] = module._req_to_string(response.request)
+            result['status_code'] = response.status_code
     else:
         module.fail_json(
             msg=f"Unexpected REST failure {response.json()}, {module._req_to_string(response.request)}"
@@ -276,11 +323,21 @@ def run_module():
                 aliases=['config'],
                 fallback=(env_fallback, ['DOPPLER_CONFIG'])),
             list=dict(type='bool', default=False),
+            per_page=dict(type='int', default=100),
+            dest=dict(type='path'),
+            fields=dict(type='list', elements='str'),
+            filters=dict(type='dict'),
+            limit=dict(type='int'),
+            return_request=dict(type='bool', default=True),
             state=dict(type='str', default='present', choices=['present','absent'], ),
         ),
         supports_check_mode=True
     )
 
+    error = list_params_error(module.params)
+    if error:
+        module.fail_json(msg=error)
+
     result = dict(
         changed=False,
         message=''
@@ -290,7 +347,10 @@ def run_module():
         module.exit_json(**result)
 
     if module.params['list'] == True:
-        result = list_configs(module)
+        try:
+            result = list_configs(module)
+        except DopplerException as e:
+            module.fail_json(msg=str(e))
         module.exit_json(**result)
 
     module.params['name'] = toSnakeCase(module.params['name'])
@@ -298,22 +358,25 @@ def run_module():
     if module.params.get('name') is None:
         module.fail_json(msg="A config name must be provided")
 
-    result = get_config(module)
+    try:
+        result = get_config(module)
 
-    if module.params['state'] == 'present':
-        if result is None:
-            result = create_config(module)
-            result['changed'] = True
+        if module.params['state'] == 'present':
+            if result is None:
+                result = create_config(module)
+                result['changed'] = True
 
-    else:
-        if result:
-            result = delete_config(module)
-            result['changed'] = True
+        else:
+            if result:
+                result = delete_config(module)
+                result['changed'] = True
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
 
     module.exit_json(**result)
 
 def main():
-    run_module()
+    run_profiled(run_module, 'doppler_config')
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
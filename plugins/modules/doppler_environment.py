@@ -63,6 +63,15 @@ options:
     - present
     type: str
     required: false
+  list:
+    description:
+    - List every environment of I(project) instead of managing one
+    - Every page is fetched, see I(per_page)
+    type: bool
+    default: false
+extends_documentation_fragment:
+- dcostakos.doppler.doppler
+- dcostakos.doppler.doppler.list
 '''
 EXAMPLES = r'''
 - name: list environments in project env-project
@@ -72,6 +81,18 @@ EXAMPLES = r'''
     token: my_token
   register: environments
 
+- name: list the slugs of the production environments in project env-project
+  dcostakos.doppler.doppler_environment:
+    project: 'env-project'
+    list: true
+    filters:
+      slug: 'prd*'
+    fields:
+    - slug
+    return_request: false
+    token: my_token
+  register: environments
+
 - name: create environment in project env-project
   dcostakos.doppler.doppler_environment:
     project: 'env-project'
@@ -96,14 +117,45 @@ changed:
   returned: success
   type: bool
   sample: true
+doppler_metrics:
+  description:
+  - Summary of the API calls made by this task, per endpoint
+  - Same keys as the C(doppler_metrics) returned by M(dcostakos.doppler.doppler_secrets)
+  returned: always
+  type: dict
+  sample:
+    calls: 2
+    errors: 0
+    retries: 0
+    bytes: 291
+    time_ms: 56.4
+    endpoints:
+      GET /environments/environment:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 65
+        status: {"404": 1}
+        time_ms: 17.9
+        max_ms: 17.9
+        latency_buckets: {"25": 1}
+      POST /environments:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 226
+        status: {"200": 1}
+        time_ms: 38.5
+        max_ms: 38.5
+        latency_buckets: {"50": 1}
 req:
   description: details about the request that was made to dopplers' api
-  returned: success
+  returned: when return_request is true
   type: str
 status_code:
   description: The HTTP status code of the request
   type: int
-  returned: success
+  returned: when return_request is true
   sample: 200
 environment:
   description: representation of the doppler environment
@@ -140,15 +192,36 @@ environment:
       description: Timestamp for initial fetch (from API).  Often null
       type: str
       sample: null
+count:
+  description: Number of items listed
+  returned: when list is true
+  type: int
+  sample: 2
+dest:
+  description: File the items were written to
+  returned: when list is true and dest is set
+  type: str
+  sample: /tmp/environments.ndjson
+environments:
+  description: Every item of every page, as returned by the API
+  returned: when list is true and dest is not set
+  type: list
+  elements: dict
 '''
 # imports
-import requests
 import re
 
 from ansible.module_utils.basic import env_fallback
 from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
     DopplerModule,
 )
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import run_profiled
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_list_utils import (
+    Paginator,
+    list_params_error,
+    list_result,
+)
 
 def toSnakeCase(string):
     string = re.sub(r'(?<=[a-z])(?=[A-Z])|[^a-zA-Z]', ' ', string).strip().replace(' ', '_')
@@ -159,37 +232,21 @@ def get_url_params(module):
         'project': module.params['project']
     }
 
-def get_headers(module):
-    return {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {module.params['token']}"
-    }
-
 def list_environments(module):
-    params = get_url_params(module)
-    return return_if_object(
-        module,
-        requests.get(
-            f"{module.params['url']}/environments",
-            headers=get_headers(module),
-            params=params,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
-    )
+    return list_result(module, Paginator(
+        module.client,
+        "/environments",
+        "environments",
+        params=get_url_params(module),
+        per_page=module.params['per_page']
+    ))
 
 def get_environment(module):
     params = get_url_params(module)
     params['environment'] = module.params['environment']
     return return_if_object(
         module,
-        requests.get(
-          f"{module.params['url']}/environments/environment",
-          params=params,
-          headers=get_headers(module),
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']
-        ),
+        module.client.get("/environments/environment", params=params),
         allow_not_found=True
     )
 
@@ -197,31 +254,17 @@ def create_environment(module):
     payload = get_url_params(module)
     payload['name'] = module.params['environment']
     payload['slug'] = module.params['slug']
-    headers = get_headers(module)
-    headers['content-type'] = "application/json"
     return return_if_object(
         module,
-        requests.post(
-          f"{module.params['url']}/environments",
-          json=payload, headers=headers,
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']
-        )
+        module.client.post("/environments", json=payload)
     )
 
 def delete_environment(module):
     payload = get_url_params(module)
     payload['environment'] = module.params['slug']
-    headers = get_headers(module)
-    headers['content-type'] = "application/json"
     return return_if_object(
         module,
-        requests.delete(
-            f"{module.params['url']}/environments/environment",
-            json=payload, headers=headers,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
+        module.client.delete("/environments/environment", json=payload)
     )
 
 def return_if_object(module, response, allow_not_found=False):
@@ -233,8 +276,9 @@ def return_if_object(module, response, allow_not_found=False):
         result = response.json()
         if result.get('value') and result.get('value').get('raw') is None:
             return None
-        result['req'] = module._req_to_string(response.request)
-        result['status_code'] = response.status_code
+        if module.params['return_request']:
+            result['req'] = module._req_to_string(response.request)
+            result['status_code'] = response.status_code
     else:
         module.fail_json(
             msg=f"Unexpected REST failure {response.json()}, {module._req_to_string(response.request)}"
@@ -258,10 +302,21 @@ def run_module():
                 fallback=(env_fallback, ['DOPPLER_ENVIRONMENT_SLUG'])
             ),
             list=dict(type='bool', default=False),
+            per_page=dict(type='int', default=100),
+            dest=dict(type='path'),
+            fields=dict(type='list', elements='str'),
+            filters=dict(type='dict'),
+            limit=dict(type='int'),
+            return_request=dict(type='bool', default=True),
             state=dict(type='str', default='present', choices=['present','absent'], ),
         ),
         supports_check_mode=True
     )
+
+    error = list_params_error(module.params)
+    if error:
+        module.fail_json(msg=error)
+
     result = dict(
         changed=False,
         message=''
@@ -271,7 +326,10 @@ def run_module():
         module.exit_json(**result)
 
     if module.params['list'] == True:
-        result = list_environments(module)
+        try:
+            result = list_environments(module)
+        except DopplerException as e:
+            module.fail_json(msg=str(e))
         module.exit_json(**result)
 
     if module.params.get('environment') is None and module.params.get('slug') is None:
@@ -283,21 +341,24 @@ def run_module():
     if module.params.get('environment') is None:
         module.params['environment'] = module.params['slug']
 
-    result = get_environment(module)
-    if module.params['state'] == 'present':
-        if result is None:
-            result = create_environment(module)
-            result['changed'] = True
+    try:
+        result = get_environment(module)
+        if module.params['state'] == 'present':
+            if result is None:
+                result = create_environment(module)
+                result['changed'] = True
 
-    else:
-        if result:
-            result = delete_environment(module)
-            result['changed'] = True
+        else:
+            if result:
+                result = delete_environment(module)
+                result['changed'] = True
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
 
     module.exit_json(**result)
 
 def main():
-    run_module()
+    run_profiled(run_module, 'doppler_environment')
 
 if __name__ == '__main__':
     main()
@@ -22,9 +22,10 @@ author:
 options:
   integration:
     description:
-    - The unique snake case name of a config
+    - The name of the integration, or the slug Doppler generated for it
+    - An existing integration is found by looking through the list of all integrations
     - Default set from OS env variable DOPPLER_INTEGRATION
-    aliases: ['name', 'integraiton_name']
+    aliases: ['name', 'integration_name']
   project:
     description:
     - Unique Name fo the project to use for this environment
@@ -65,72 +66,151 @@ options:
     - present
     type: str
     required: false
+  type:
+    description:
+    - The type of integration to create, for example C(aws_secrets_manager)
+    - Required when the integration does not exist yet
+    type: str
+  data:
+    description:
+    - Settings of the integration to create, the keys depend on I(type)
+    type: dict
+  list:
+    description:
+    - List every integration of the workspace instead of managing one
+    - Every page is fetched, see I(per_page)
+    type: bool
+    default: false
+extends_documentation_fragment:
+- dcostakos.doppler.doppler
+- dcostakos.doppler.doppler.list
 '''
 
 EXAMPLES = r'''
+- name: Create an AWS Secrets Manager integration
+  dcostakos.doppler.doppler_integration:
+    project: 'ansible-project'
+    environment: 'prd'
+    name: 'aws-prd'
+    type: aws_secrets_manager
+    data:
+      aws_assume_role_arn: 'arn:aws:iam::123456789012:role/doppler'
+    token: my_token
+
+- name: List the slugs of every AWS integration
+  dcostakos.doppler.doppler_integration:
+    project: 'ansible-project'
+    environment: 'prd'
+    list: true
+    filters:
+      type: 'aws_*'
+    fields:
+    - slug
+    - name
+    token: my_token
+  register: integrations
 '''
 
 RETURN = r'''
+changed:
+  description: Whether something changed in Doppler as a result of this call
+  returned: success
+  type: bool
+  sample: true
+doppler_metrics:
+  description:
+  - Summary of the API calls made by this task, per endpoint
+  - Same keys as the C(doppler_metrics) returned by M(dcostakos.doppler.doppler_secrets)
+  returned: always
+  type: dict
+  sample:
+    calls: 1
+    errors: 0
+    retries: 0
+    bytes: 534
+    time_ms: 24.8
+    endpoints:
+      GET /integrations:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 534
+        status: {"200": 1}
+        time_ms: 24.8
+        max_ms: 24.8
+        latency_buckets: {"25": 1}
+req:
+  description: details about the request that was made to dopplers' api
+  returned: when return_request is true
+  type: str
+status_code:
+  description: The HTTP status code of the request
+  returned: when return_request is true
+  type: int
+  sample: 200
+count:
+  description: Number of items listed
+  returned: when list is true
+  type: int
+  sample: 2
+dest:
+  description: File the items were written to
+  returned: when list is true and dest is set
+  type: str
+  sample: /tmp/integrations.ndjson
+integrations:
+  description: Every item of every page, as returned by the API
+  returned: when list is true and dest is not set
+  type: list
+  elements: dict
 '''
 
-import requests
-
 from ansible.module_utils.basic import env_fallback
 from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
     DopplerModule,
 )
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import run_profiled
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_list_utils import (
+    Paginator,
+    list_params_error,
+    list_result,
+)
 
 
-def get_headers(module):
-    return {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {module.params['token']}"
-    }
-
 def list_integrations(module):
-    return return_if_object(
-        module,
-        requests.get(
-            f"{module.params['url']}/integrations",
-            headers=get_headers(module),
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
-    )
+    return list_result(module, Paginator(
+        module.client,
+        "/integrations",
+        "integrations",
+        per_page=module.params['per_page']
+    ))
 
 def get_integration(module):
-    params = {
-        'integration': module.params['integration']
-    }
-    return return_if_object(
-        module,
-        requests.get(
-            f"{module.params['url']}/integrations/integraiton",
-            params=params,
-            headers=get_headers(module),
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        ),
-        allow_not_found=True
-    )
+    # Doppler addresses an integration by the slug it generates on create,
+    # so the name given to create it is looked for among all of them
+    name = module.params['integration']
+    pages = Paginator(module.client, "/integrations", "integrations", per_page=module.params['per_page'])
+    for integration in pages:
+        if name in (integration.get('name'), integration.get('slug')):
+            result = dict(integration=integration, success=True, changed=False)
+            if module.params['return_request']:
+                result['req'] = module._req_to_string(pages.response.request)
+                result['status_code'] = pages.response.status_code
+            return result
+    return None
 
 def create_integration(module):
+    if not module.params['type']:
+        raise DopplerException("type is required to create an integration")
     params = {
-        'integration': module.params['integration'],
+        'name': module.params['integration'],
         'type': module.params['type'],
+        'data': module.params['data'] or {},
     }
-    for key in module.params['fields'].keys():
-        params[key] = module.params['fields'][key]
-    headers = get_headers(module)
-    headers['accept'] = 'application/json'
     return return_if_object(
         module,
-        requests.post(
-            f"{module.params['url']}/integrations",
-            json=params, headers=headers,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
+        module.client.post("/integrations", json=params)
     )
 
 def update_integration(module):
@@ -148,8 +228,9 @@ def return_if_object(module, response, allow_not_found=False):
         result = response.json()
         if result.get('value') and result.get('value').get('raw') is None:
             return None
-        result['req'] = module._req_to_string(response.request)
-        result['status_code'] = response.status_code
+        if module.params['return_request']:
+            result['req'] = module._req_to_string(response.request)
+            result['status_code'] = response.status_code
     else:
         module.fail_json(
             msg=f"Unexpected REST failure {response.json()}, {module._req_to_string(response.request)}"
@@ -172,12 +253,24 @@ def run_module():
                 type='str',
                 aliases=['name', 'integration_name'],
                 fallback=(env_fallback, ['DOPPLER_INTEGRATION'])),
+            type=dict(type='str'),
+            data=dict(type='dict'),
             list=dict(type='bool', default=False),
+            per_page=dict(type='int', default=100),
+            dest=dict(type='path'),
+            fields=dict(type='list', elements='str'),
+            filters=dict(type='dict'),
+            limit=dict(type='int'),
+            return_request=dict(type='bool', default=True),
             state=dict(type='str', default='present', choices=['present','absent'], ),
         ),
         supports_check_mode=True
     )
 
+    error = list_params_error(module.params)
+    if error:
+        module.fail_json(msg=error)
+
     result = dict(
         changed=False,
         message=''
@@ -187,25 +280,31 @@ def run_module():
         module.exit_json(**result)
 
     if module.params['list'] == True:
-        result = list_integrations(module)
+        try:
+            result = list_integrations(module)
+        except DopplerException as e:
+            module.fail_json(msg=str(e))
         module.exit_json(**result)
 
-    result = get_integration(module)
+    try:
+        result = get_integration(module)
 
-    if module.params['state'] == 'present':
-        if result is None:
-            result = create_integration(module)
-            result['changed'] = True
+        if module.params['state'] == 'present':
+            if result is None:
+                result = create_integration(module)
+                result['changed'] = True
 
-    else:
-        if result:
-            result = delete_integration(module)
-            result['changed'] = True
+        else:
+            if result:
+                result = delete_integration(module)
+                result['changed'] = True
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
 
     module.exit_json(**result)
 
 def main():
-    run_module()
+    run_profiled(run_module, 'doppler_integration')
 
 if __name__ == '__main__':
     main()
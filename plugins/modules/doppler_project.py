@@ -56,6 +56,15 @@ options:
     - absent
     - present
     type: str
+  list:
+    description:
+    - List every project of the workspace instead of managing one
+    - Every page is fetched, see I(per_page)
+    type: bool
+    default: false
+extends_documentation_fragment:
+- dcostakos.doppler.doppler
+- dcostakos.doppler.doppler.list
 '''
 
 EXAMPLES = r'''
@@ -79,6 +88,23 @@ EXAMPLES = r'''
     list: true
   register: project
 
+- name: Stream every project of a large workspace to a file
+  dcostakos.doppler.doppler_project:
+    token: my_token
+    list: true
+    dest: /tmp/projects.ndjson
+
+- name: List the slug and name of the payments team projects
+  dcostakos.doppler.doppler_project:
+    token: my_token
+    list: true
+    filters:
+      name: 'payments-*'
+    fields:
+    - slug
+    - name
+  register: projects
+
 - name: Test deleting project
   dcostakos.doppler.doppler_project:
     project: "ansible-project"
@@ -92,14 +118,45 @@ changed:
   returned: success
   type: bool
   sample: true
+doppler_metrics:
+  description:
+  - Summary of the API calls made by this task, per endpoint
+  - Same keys as the C(doppler_metrics) returned by M(dcostakos.doppler.doppler_secrets)
+  returned: always
+  type: dict
+  sample:
+    calls: 2
+    errors: 0
+    retries: 0
+    bytes: 304
+    time_ms: 58.5
+    endpoints:
+      GET /projects/project:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 61
+        status: {"404": 1}
+        time_ms: 18.4
+        max_ms: 18.4
+        latency_buckets: {"25": 1}
+      POST /projects:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 243
+        status: {"200": 1}
+        time_ms: 40.1
+        max_ms: 40.1
+        latency_buckets: {"50": 1}
 req:
   description: details about the request that was made to dopplers' api
-  returned: success
+  returned: when return_request is true
   type: str
 status_code:
   description: The HTTP status code of the request
   type: int
-  returned: success
+  returned: when return_request is true
   sample: 200
 project:
   description: When creating or getting an existing project, return the API details
@@ -128,46 +185,52 @@ project:
       description: The doppler project slug
       returned: success
       type: str
+count:
+  description: Number of items listed
+  returned: when list is true
+  type: int
+  sample: 2
+dest:
+  description: File the items were written to
+  returned: when list is true and dest is set
+  type: str
+  sample: /tmp/projects.ndjson
+projects:
+  description: Every item of every page, as returned by the API
+  returned: when list is true and dest is not set
+  type: list
+  elements: dict
 '''
 
 # imports
-import requests
 
 from ansible.module_utils.basic import env_fallback
 from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
     DopplerModule,
 )
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import run_profiled
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_list_utils import (
+    Paginator,
+    list_params_error,
+    list_result,
+)
 
 def get_url_params(module):
     return { 'project': module.params['project']}
 
-def get_headers(module):
-    return {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {module.params['token']}"
-    }
-
 def list_projects(module):
-    return return_if_object(
-        module,
-        requests.get(
-            f"{module.params['url']}/projects",
-            headers=get_headers(module),
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
-    )
+    return list_result(module, Paginator(
+        module.client,
+        "/projects",
+        "projects",
+        per_page=module.params['per_page']
+    ))
 
 def get_project(module):
     return return_if_object(
         module,
-        requests.get(
-          f"{module.params['url']}/projects/project",
-          params=get_url_params(module),
-          headers=get_headers(module),
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']
-        ),
+        module.client.get("/projects/project", params=get_url_params(module)),
         allow_not_found=True
     )
 
@@ -176,30 +239,16 @@ def create_project(module):
         "name": module.params['project'],
         "description": module.params['description']
     }
-    headers = get_headers(module)
-    headers['content-type'] = "application/json"
     return return_if_object(
         module,
-        requests.post(
-          f"{module.params['url']}/projects",
-          json=payload, headers=headers,
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']
-        )
+        module.client.post("/projects", json=payload)
     )
 
 def delete_project(module):
     payload = { "project": module.params['project'] }
-    headers = get_headers(module)
-    headers['content-type'] = "application/json"
     return return_if_object(
         module,
-        requests.delete(
-            f"{module.params['url']}/projects/project",
-            json=payload, headers=headers,
-            timeout=module.params['timeout'],
-            verify=module.params['validate_certs']
-        )
+        module.client.delete("/projects/project", json=payload)
     )
 
 def update_project(module):
@@ -208,16 +257,9 @@ def update_project(module):
         "project": module.params['project'],
         "description": module.params['description']
     }
-    headers = get_headers(module)
-    headers['content-type'] = "application/json"
     return return_if_object(
         module,
-        requests.post(
-          f"{module.params['url']}/projects/project",
-          json=payload, headers=headers,
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']
-        )
+        module.client.post("/projects/project", json=payload)
     )
 
 def return_if_object(module, response, allow_not_found=False):
@@ -229,8 +271,9 @@ def return_if_object(module, response, allow_not_found=False):
         result = response.json()
         if result.get('value') and result.get('value').get('raw') is None:
             return None
-        result['req'] = module._req_to_string(response.request)
-        result['status_code'] = response.status_code
+        if module.params['return_request']:
+            result['req'] = module._req_to_string(response.request)
+            result['status_code'] = response.status_code
     else:
         module.fail_json(
             msg=f"Unexpected REST failure {response.json()}, {module._req_to_string(response.request)}"
@@ -250,10 +293,21 @@ def run_module():
                 fallback=(env_fallback, ['DOPPLER_DESCRIPTION']),
                 required=False),
             list=dict(type='bool', default=False),
+            per_page=dict(type='int', default=100),
+            dest=dict(type='path'),
+            fields=dict(type='list', elements='str'),
+            filters=dict(type='dict'),
+            limit=dict(type='int'),
+            return_request=dict(type='bool', default=True),
             state=dict(type='str', default='present', choices=['present','absent'], ),
         ),
         supports_check_mode=True
     )
+
+    error = list_params_error(module.params)
+    if error:
+        module.fail_json(msg=error)
+
     result = dict(
         changed=False,
         message=''
@@ -263,7 +317,10 @@ def run_module():
         module.exit_json(**result)
 
     if module.params['list'] == True:
-        result = list_projects(module)
+        try:
+            result = list_projects(module)
+        except DopplerException as e:
+            module.fail_json(msg=str(e))
         module.exit_json(**result)
 
     if module.params.get('project') is None:
@@ -272,25 +329,28 @@ def run_module():
     if module.params['description'] is None:
         module.params['description'] = f"Project {module.params['project']}"
 
-    result = get_project(module)
-    if module.params['state'] == 'present':
-        if result is None:
-            result = create_project(module)
-            result['changed'] = True
-        else:
-            if result['project']['description'] != module.params['description']:
-                result = update_project(module)
+    try:
+        result = get_project(module)
+        if module.params['state'] == 'present':
+            if result is None:
+                result = create_project(module)
                 result['changed'] = True
+            else:
+                if result['project']['description'] != module.params['description']:
+                    result = update_project(module)
+                    result['changed'] = True
 
-    else:
-        if result:
-            result = delete_project(module)
-            result['changed'] = True
+        else:
+            if result:
+                result = delete_project(module)
+                result['changed'] = True
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
 
     module.exit_json(**result)
 
 def main():
-    run_module()
+    run_profiled(run_module, 'doppler_project')
 
 
 if __name__ == '__main__':
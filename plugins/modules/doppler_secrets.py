@@ -33,7 +33,7 @@ options:
   name:
     description:
     - Name of the Doppler secret
-    - may default to OS Environment variable DOPPLER_NAME
+    - may default to OS Environment variable DOPPLER_NAME when neither I(secrets) nor I(src) is set
     type: str
   url:
     description:
@@ -57,10 +57,15 @@ options:
   state:
     description:
     - Whether the secret should exist or not
+    - C(exact) makes the config hold exactly the secrets in I(secrets), every other
+      secret is deleted in the same write as the creates and updates
+    - The C(DOPPLER_PROJECT), C(DOPPLER_ENVIRONMENT) and C(DOPPLER_CONFIG) secrets
+      maintained by Doppler are never deleted
     default: present
     choices:
     - absent
     - present
+    - exact
     type: str
   value:
     description:
@@ -78,8 +83,74 @@ options:
     - if false, do not return, useful for validating a secret exists
     type: bool
     default: True
+  secrets:
+    description:
+    - Mapping of secret names to values, managed together instead of a single I(name)
+    - The whole config is read once, compared locally, and every created or updated
+      secret is sent in one write
+    - With I(state=absent) the listed names are deleted in one write and the values are ignored
+    - A null value only checks that the secret exists, like I(name) without I(value)
+    - Mutually exclusive with I(name) and I(value)
+    - Combined with I(src), entries here take precedence over the file
+    type: dict
+  src:
+    description:
+    - Path to a dotenv, JSON or YAML file holding a mapping of secret names to values
+    - The file is looked up on the controller like the C(src) of M(ansible.builtin.copy),
+      relative paths are searched in the C(files) directories of the play or role
+    - Handled like I(secrets), one read of the config and only changed keys written,
+      in chunks of I(batch_size)
+    - dotenv files are parsed line by line, C(export) prefixes, comments and quoted values are understood
+    - Nested JSON or YAML values are stored as JSON strings
+    - Mutually exclusive with I(name) and I(value)
+    type: path
+  src_format:
+    description:
+    - Format of I(src)
+    - C(auto) picks C(json) for C(.json), C(yaml) for C(.yml) and C(.yaml), and C(dotenv) otherwise
+    - C(yaml) requires PyYAML on the host executing the module
+    type: str
+    default: auto
+    choices:
+    - auto
+    - dotenv
+    - json
+    - yaml
+  batch_size:
+    description:
+    - Maximum number of changes sent in one write when using I(secrets) or I(src)
+    - Larger change sets are split into several writes
+    type: int
+    default: 500
+  configs:
+    description:
+    - Apply the same change to several configs at once instead of the single I(config)
+    - Each item is either a config name in I(project) or a dict with C(project) and C(config) keys
+    - Configs are updated concurrently, see I(max_workers)
+    - Works with I(name) as well as with I(secrets) and I(src)
+    type: list
+    elements: raw
+  max_workers:
+    description:
+    - Maximum number of configs from I(configs) updated at the same time
+    type: int
+    default: 8
+  force:
+    description:
+    - Write I(value) without reading the current secret first
+    - Saves one API call when the write is known to be wanted, such as a credential rotation
+    - The task always reports changed
+    - Only applies to I(state=present) and requires I(value)
+    type: bool
+    default: False
+extends_documentation_fragment:
+- dcostakos.doppler.doppler
 notes:
 - 'API Reference U(https://docs.doppler.com/reference/api)'
+- The module always runs on the controller, no matter which host the task targets
+- Identical invocations of one task across hosts are coalesced, the API is called once and
+  every host receives the same result. Failures are not shared, and every C(until)/C(retries)
+  attempt runs again
 - 'Official Documentation U(https://docs.doppler.com/docs)'
 '''
 
@@ -115,6 +186,59 @@ EXAMPLES = r'''
     config: dev
     token: my_token
     value: super_secret_new_value
+
+- name: Manage several doppler secrets with a single read and write
+  dcostakos.doppler.doppler_secrets:
+    project: secret_project
+    config: dev
+    token: my_token
+    secrets:
+      DB_HOST: db.example.com
+      DB_USER: app
+      DB_PASSWORD: "{{ db_password }}"
+  register: secrets
+
+- name: Make the dev config hold exactly these secrets
+  dcostakos.doppler.doppler_secrets:
+    project: secret_project
+    config: dev
+    token: my_token
+    state: exact
+    secrets:
+      DB_HOST: db.example.com
+      DB_USER: app
+
+- name: Import secrets from a dotenv file on the controller
+  dcostakos.doppler.doppler_secrets:
+    project: secret_project
+    config: dev
+    token: my_token
+    src: legacy.env
+    return_value: false
+
+- name: Rotate a credential in every config that uses it
+  dcostakos.doppler.doppler_secrets:
+    name: API_KEY
+    value: "{{ new_api_key }}"
+    project: secret_project
+    configs:
+    - dev
+    - stg
+    - prd
+    - project: other_project
+      config: prd
+    token: my_token
+    return_value: false
+  register: rotation
+
+- name: Rotate a doppler secret without reading it first
+  dcostakos.doppler.doppler_secrets:
+    name: my_secret
+    project: secret_project
+    config: dev
+    token: my_token
+    value: "{{ new_password }}"
+    force: true
 '''
 
 RETURN = r'''
@@ -123,6 +247,44 @@ changed:
   returned: success
   type: bool
   sample: true
+doppler_metrics:
+  description:
+  - Summary of the API calls made by this task
+  - C(time_ms) is the sum of the call latencies, including retries and rate limit waits
+  - C(errors) counts calls that got no response, or an error status other than 404
+  - C(retries) counts the times a call was sent again after a rate limit, server error or connection error
+  - Each entry of C(endpoints) is keyed on method and path and holds the calls, errors, retries and
+    response bytes of that endpoint, the count of each status, and the total and slowest latency
+  - C(latency_buckets) counts the calls of an endpoint per latency bucket, keyed on the upper bound
+    of the bucket in milliseconds, one of 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000 or +Inf.
+    The summary keeps the same size however many calls a task makes
+  returned: always
+  type: dict
+  sample:
+    calls: 2
+    errors: 0
+    retries: 0
+    bytes: 602
+    time_ms: 70.0
+    endpoints:
+      GET /configs/config/secret:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 190
+        status: {"200": 1}
+        time_ms: 21.7
+        max_ms: 21.7
+        latency_buckets: {"25": 1}
+      POST /configs/config/secrets:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 412
+        status: {"200": 1}
+        time_ms: 48.3
+        max_ms: 48.3
+        latency_buckets: {"50": 1}
 name:
   description: Name of the secret created/updated
   type: str
@@ -137,6 +299,29 @@ url:
   description: the URL of the requested resource with encoded parameters
   type: str
   returned: success
+secrets:
+  description:
+  - Per secret outcome when I(secrets) is used
+  - C(status) is one of created, updated, unchanged, deleted or absent
+  - With I(state=exact) the secrets that were removed are listed as deleted
+  - C(value) holds the raw and computed value unless I(return_value=false)
+  returned: when secrets or src is set
+  type: dict
+  sample: {"DB_HOST": {"status": "created", "value": {"raw": "db.example.com", "computed": "db.example.com"}}}
+targets:
+  description:
+  - Per config outcome when I(configs) is used, in the order the configs were given
+  - Each item holds C(project) and C(config) plus what a single config run returns,
+    or C(failed) and C(msg) when that config could not be updated
+  returned: when configs is set
+  type: list
+  elements: dict
+  sample: [{"project": "secret_project", "config": "dev", "changed": true, "name": "API_KEY"}]
+elapsed:
+  description: Wall time in seconds spent applying the change to all of I(configs)
+  returned: when configs is set
+  type: float
+  sample: 0.412
 value:
   description: Secret value information
   returned: success
@@ -155,47 +340,54 @@ value:
 '''
 
 # imports
-import requests
-
-from ansible.module_utils.basic import AnsibleModule, env_fallback
+import json
+import os
+import re
+import time
+
+try:
+    import yaml
+    HAS_YAML = True
+except ImportError:
+    HAS_YAML = False
+
+from ansible.module_utils.basic import missing_required_lib
 from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
     DopplerModule,
 )
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import run_profiled
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_secrets_utils import (
+    RESERVED_SECRETS,
+    diff_deletes,
+    diff_secrets,
+    fan_out,
+    list_secrets,
+    normalize_targets,
+    write_secrets,
+)
 
 
-def get_url_params(module):
-    return { k:module.params[k] for k in ('name','project','config') }
-
-
-def get_headers(module):
-    return {
-        "Accept": "application/json",
-        "Authorization": f"Bearer {module.params['token']}"
-    }
+def get_url_params(module, project, config):
+    return {'name': module.params['name'], 'project': project, 'config': config}
 
 
-def get_secret(module):
+def get_secret(module, project, config):
     return return_if_object(
         module,
-        requests.get(
-          f"{module.params['url']}/configs/config/secret",
-          params=get_url_params(module),
-          headers=get_headers(module),
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']
-        ),
+        module.client.get("/configs/config/secret", params=get_url_params(module, project, config)),
         allow_not_found=True
     )
 
 
-def create_secret(module):
-    return update_secret(module)
+def create_secret(module, project, config):
+    return update_secret(module, project, config)
 
 
-def update_secret(module):
+def update_secret(module, project, config):
     payload = {
-        "project": module.params['project'],
-        "config": module.params['config'],
+        "project": project,
+        "config": config,
         "change_requests": [
             {
                 "name": module.params['name'],
@@ -204,25 +396,20 @@ def update_secret(module):
             }
         ]
     }
-    headers = get_headers(module)
-    headers['Content-type'] = "application/json"
-    return_if_object(
+    return secret_from_response(
         module,
-        requests.post(
-          f"{module.params['url']}/configs/config/secrets",
-          json=payload, headers=headers,
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']
+        return_if_object(
+            module,
+            module.client.post("/configs/config/secrets", json=payload)
         )
     )
-    return get_secret(module)
 
 
 # not documented, but what the heck
-def delete_secret(module):
+def delete_secret(module, project, config):
     payload = {
-        "project": module.params['project'],
-        "config": module.params['config'],
+        "project": project,
+        "config": config,
         "change_requests": [
             {
                 "name": module.params['name'],
@@ -232,18 +419,187 @@ def delete_secret(module):
             }
         ]
     }
-    headers = get_headers(module)
-    headers['Content-type'] = "application/json"
-    return return_if_object(
+    result = return_if_object(
         module,
-        requests.post(
-          f"{module.params['url']}/configs/config/secrets",
-          json=payload, headers=headers,
-          timeout=module.params['timeout'],
-          verify=module.params['validate_certs']),
+        module.client.post("/configs/config/secrets", json=payload),
     )
+    # the response lists every remaining secret in the config, none of which
+    # belong in the result of deleting one of them
+    result.pop('secrets', None)
+    result['name'] = module.params['name']
+    return result
+
+
+def secret_from_response(module, result):
+    # writes answer with every secret in the config, so the written secret
+    # can be picked out of the response instead of being read back
+    secrets = result.pop('secrets', {})
+    result['name'] = module.params['name']
+    result['value'] = secrets.get(module.params['name'])
+    return result
+
+
+# a quoted value ends at its closing quote, a comment may follow it
+QUOTED_VALUE = {
+    '"': re.compile(r'"((?:[^"\\]|\\.)*)"\s*(?:#.*)?$'),
+    "'": re.compile(r"'([^']*)'\s*(?:#.*)?$"),
+}
+
+
+def parse_dotenv(lines):
+    # one line at a time, so large files are never held in memory as text
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('export '):
+            line = line[len('export '):].lstrip()
+        name, sep, value = line.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"line {lineno}: expected NAME=value")
+        value = value.strip()
+        quoted = QUOTED_VALUE[value[0]].match(value) if value[:1] in QUOTED_VALUE else None
+        if quoted:
+            quote, value = value[0], quoted.group(1)
+            if quote == '"':
+                value = value.replace('\\n', '\n').replace('\\"', '"')
+        else:
+            value = value.split(' #', 1)[0].rstrip()
+        yield name.strip(), value
+
+
+def src_format(module):
+    if module.params['src_format'] != 'auto':
+        return module.params['src_format']
+    ext = os.path.splitext(module.params['src'])[1].lower()
+    if ext == '.json':
+        return 'json'
+    if ext in ('.yml', '.yaml'):
+        return 'yaml'
+    return 'dotenv'
+
+
+def read_src(module):
+    path = module.params['src']
+    fmt = src_format(module)
+    if fmt == 'yaml' and not HAS_YAML:
+        module.fail_json(msg=missing_required_lib('PyYAML'))
+
+    try:
+        f = open(path, 'r')
+    except (IOError, OSError) as e:
+        module.fail_json(msg=f"Unable to read {path}: {e}")
+
+    with f:
+        try:
+            if fmt == 'dotenv':
+                secrets = dict(parse_dotenv(f))
+            elif fmt == 'json':
+                secrets = json.load(f)
+            else:
+                secrets = yaml.safe_load(f)
+        except Exception as e:
+            module.fail_json(msg=f"Unable to parse {path} as {fmt}: {e}")
+
+    if not isinstance(secrets, dict):
+        module.fail_json(msg=f"{path} must hold a mapping of secret names to values")
+    return secrets
+
+
+def desired_secrets(module):
+    desired = {}
+    if module.params['src'] is not None:
+        desired.update(read_src(module))
+    if module.params['secrets'] is not None:
+        desired.update(module.params['secrets'])
+    return desired
+
+
+def run_batch(module, desired, project, config):
+    current = list_secrets(module.client, project, config)
+    if module.params['state'] == 'absent':
+        changes, status = diff_deletes(current, desired)
+    else:
+        changes, status = diff_secrets(current, desired)
+
+    if module.params['state'] == 'exact':
+        extra = [
+            name for name in current
+            if name not in desired and name not in RESERVED_SECRETS
+        ]
+        delete_changes, delete_status = diff_deletes(current, extra)
+        changes.extend(delete_changes)
+        status.update(delete_status)
+
+    if changes:
+        current = write_secrets(module.client, project, config, changes, module.params['batch_size'])
+
+    secrets = {}
+    for name, st in status.items():
+        secrets[name] = {'status': st}
+        if module.params['return_value'] and name in current:
+            secrets[name]['value'] = current[name]
+    return dict(changed=bool(changes), secrets=secrets)
+
+
+def run_single(module, project, config):
+    if module.params['force'] and module.params['state'] == 'present':
+        if module.params.get('value') is None:
+            raise DopplerException("force requires a value to write")
+        result = update_secret(module, project, config)
+        result['changed'] = True
+    else:
+        result = run_state(module, project, config)
+
+    if not module.params['return_value']:
+        result.pop('value', None)
+        result['note'] = "Not returning value because return_value set to false"
+    return result
 
 
+def run_state(module, project, config):
+    result = get_secret(module, project, config)
+    if module.params['state'] == 'present':
+        # secret is absent
+        if result is None:
+            if module.params.get('value'):
+                result = create_secret(module, project, config)
+                result['changed'] = True
+            else:
+                raise DopplerException(
+                    f"Secret {module.params['name']} doesn't exist and can't create with no value"
+                )
+        # secret is present
+        else:
+            # compariing the "raw" secret rather than the calculated secret
+            # seems to be what makes the most sense
+            if module.params.get('value'):
+                if module.params.get('value') != result['value']['raw']:
+                    result = update_secret(module, project, config)
+                    result['changed'] = True
+            else:
+                result['changed'] = False
+
+    elif module.params['state'] == 'absent':
+        if result is None:
+            result = dict(
+                changed=False,
+                msg=f"Secret {module.params['name']} is absent"
+            )
+        else:
+            result = delete_secret(module, project, config)
+            result['changed'] = True
+
+    return result
+
+
+def run_target(module, desired, project, config):
+    if desired is not None:
+        return run_batch(module, desired, project, config)
+    return run_single(module, project, config)
+
+
+# raises rather than failing the module, targets may be handled on worker threads
 def return_if_object(module, response, allow_not_found=False):
     result = response.json()
 
@@ -256,9 +612,8 @@ def return_if_object(module, response, allow_not_found=False):
         result['url'] = response.request.url
         result['status_code'] = response.status_code
     else:
-
-        module.fail_json(
-            msg=f"Unexpected REST failure {response.json()} - {module._req_to_string(response.request)}"
+        raise DopplerException(
+            f"Unexpected REST failure {response.json()} - {module._req_to_string(response.request)}"
         )
     return result
 
@@ -266,11 +621,20 @@ def return_if_object(module, response, allow_not_found=False):
 def run_module():
     module = DopplerModule(
         argument_spec = dict(
-            name=dict(type='str', fallback=(env_fallback, ['DOPPLER_NAME'])),
-            state=dict(type='str', default='present', choices=['present','absent'], ),
+            name=dict(type='str'),
+            state=dict(type='str', default='present', choices=['present','absent','exact'], ),
             value=dict(type='str'),
             return_value=dict(type='bool', default=True),
+            force=dict(type='bool', default=False),
+            secrets=dict(type='dict'),
+            src=dict(type='path'),
+            src_format=dict(type='str', default='auto', choices=['auto', 'dotenv', 'json', 'yaml']),
+            batch_size=dict(type='int', default=500),
+            configs=dict(type='list', elements='raw'),
+            max_workers=dict(type='int', default=8),
         ),
+        mutually_exclusive=[('name', 'secrets'), ('value', 'secrets'), ('name', 'src'), ('value', 'src')],
+        required_if=[('state', 'exact', ('secrets', 'src'), True)],
         supports_check_mode=True
     )
     result = dict(
@@ -281,49 +645,55 @@ def run_module():
     if module.check_mode:
         module.exit_json(**result)
 
-    result = get_secret(module)
-    if module.params['state'] == 'present':
-        # secret is absent
-        if result is None:
-            if module.params.get('value'):
-                result = create_secret(module)
-                result = get_secret(module)
-                result['changed'] = True
-            else:
-                module.fail_json(
-                  msg=f"Secret {module.params['name']} doesn't exist and can't create with no value"
-                )
-        # secret is present
-        else:
-            # compariing the "raw" secret rather than the calculated secret
-            # seems to be what makes the most sense
-            if module.params.get('value'):
-                if module.params.get('value') != result['value']['raw']:
-                    result = update_secret(module)
-                    result['changed'] = True
-            else:
-                result['changed'] = False
+    if module.params['batch_size'] < 1:
+        module.fail_json(msg="batch_size must be at least 1")
 
+    desired = None
+    if module.params['secrets'] is not None or module.params['src'] is not None:
+        desired = desired_secrets(module)
+    elif module.params['name'] is None:
+        # not an env_fallback, those are applied before mutually_exclusive is
+        # checked and an exported DOPPLER_NAME would clash with secrets and src
+        module.params['name'] = os.environ.get('DOPPLER_NAME')
 
-    elif module.params['state'] == 'absent':
-        if result is None:
-            result = dict(
-                changed=False,
-                msg=f"Secret {module.params['name']} is absent"
-            )
-        else:
-            result = delete_secret(module)
-            result['changed'] = True
+    if module.params['configs']:
+        run_fan_out(module, desired)
 
+    try:
+        result = run_target(module, desired, module.params['project'], module.params['config'])
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
+    module.exit_json(**result)
 
-    if not module.params['return_value']:
-        result.pop('value')
-        result['note'] = "Not returning value because return_value set to false"
+
+def run_fan_out(module, desired):
+    try:
+        targets = normalize_targets(module.params['configs'], module.params['project'])
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
+
+    def apply(project, config):
+        return dict(run_target(module, desired, project, config), project=project, config=config)
+
+    start = time.monotonic()
+    results = fan_out(apply, targets, module.params['max_workers'])
+    result = dict(
+        changed=any(r.get('changed') for r in results),
+        targets=results,
+        elapsed=round(time.monotonic() - start, 3)
+    )
+
+    failed = [r for r in results if r.get('failed')]
+    if failed:
+        module.fail_json(
+            msg=f"Failed to apply the change to {len(failed)} of {len(results)} configs",
+            **result
+        )
     module.exit_json(**result)
 
 
 def main():
-    run_module()
+    run_profiled(run_module, 'doppler_secrets')
 
 
 if __name__ == '__main__':
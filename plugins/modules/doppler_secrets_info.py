@@ -0,0 +1,234 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+################################################################################
+# Documentation
+################################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1', 'status': ["preview"], 'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+module: doppler_secrets_info
+short_description: Read every secret of a Doppler config in one call
+description:
+- Return the secrets of a config from a single API request
+- Names can be narrowed down with glob patterns and regular expressions
+- When I(include) only lists exact names and no regular expressions are given,
+  Doppler is asked to return just those secrets
+author:
+- Dave Costakos <dcostako@redhat.com>
+options:
+  project:
+    description:
+    - Unique identifier for the project object in Doppler
+    - Default set os env DOPPLER_PROJECT
+    type: str
+  config:
+    description:
+    - Name of the config object in Doppler
+    - May default to OS Environment variable DOPPLER_CONFIG
+    type: str
+  include:
+    description:
+    - Only return secrets whose name matches one of these glob patterns
+    - All secrets are returned when neither I(include) nor I(include_regex) is set
+    type: list
+    elements: str
+  include_regex:
+    description:
+    - Only return secrets whose name matches one of these regular expressions
+    type: list
+    elements: str
+  exclude:
+    description:
+    - Never return secrets whose name matches one of these glob patterns
+    type: list
+    elements: str
+  exclude_regex:
+    description:
+    - Never return secrets whose name matches one of these regular expressions
+    type: list
+    elements: str
+  return_raw:
+    description:
+    - Whether to return the raw value of each secret, which may reference other secrets
+    type: bool
+    default: True
+  return_computed:
+    description:
+    - Whether to return the computed value of each secret, with references resolved
+    type: bool
+    default: True
+  url:
+    description:
+    - the URL for the API instance of doppler
+    - May default to OS Environment variable DOPPLER_URL
+    type: str
+    required: False
+    default: https://api.doppler.com/v3
+  token:
+    description:
+    - Authentication token for doppler
+    - May default to OS Environment variable DOPPLER_TOKEN
+    type: str
+    required: False
+  timeout:
+    description:
+    - Requests timeout value for url get
+    type: int
+    required: False
+    default: 5
+extends_documentation_fragment:
+- dcostakos.doppler.doppler
+notes:
+- 'API Reference U(https://docs.doppler.com/reference/api)'
+- When both I(return_raw) and I(return_computed) are false only the secret names are returned
+'''
+
+EXAMPLES = r'''
+- name: Read a whole config
+  dcostakos.doppler.doppler_secrets_info:
+    project: secret_project
+    config: dev
+    token: my_token
+  register: dev_secrets
+
+- name: Read the database settings, computed values only
+  dcostakos.doppler.doppler_secrets_info:
+    project: secret_project
+    config: prd
+    token: my_token
+    include:
+    - DB_*
+    exclude_regex:
+    - _TEST$
+    return_raw: false
+  register: db
+
+- name: List secret names without their values
+  dcostakos.doppler.doppler_secrets_info:
+    project: secret_project
+    config: prd
+    token: my_token
+    return_raw: false
+    return_computed: false
+  register: names
+'''
+
+RETURN = r'''
+changed:
+  description: Always false, nothing is changed in Doppler
+  returned: always
+  type: bool
+  sample: false
+doppler_metrics:
+  description:
+  - Summary of the API calls made by this task, per endpoint
+  - Same keys as the C(doppler_metrics) returned by M(dcostakos.doppler.doppler_secrets)
+  returned: always
+  type: dict
+  sample:
+    calls: 1
+    errors: 0
+    retries: 0
+    bytes: 2318
+    time_ms: 35.2
+    endpoints:
+      GET /configs/config/secrets:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 2318
+        status: {"200": 1}
+        time_ms: 35.2
+        max_ms: 35.2
+        latency_buckets: {"50": 1}
+count:
+  description: Number of secrets returned
+  returned: success
+  type: int
+  sample: 2
+secrets:
+  description: Secrets of the config keyed by name
+  returned: success
+  type: dict
+  sample: {"DB_HOST": {"raw": "db.example.com", "computed": "db.example.com"}, "DB_URL": {"raw": "${DB_HOST}:5432"}}
+'''
+
+# imports
+import re
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
+    DopplerModule,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import run_profiled
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_secrets_utils import (
+    is_literal,
+    list_secrets,
+    name_filter,
+)
+
+
+def server_side_names(module):
+    include = module.params['include']
+    if include and not module.params['include_regex'] and all(is_literal(p) for p in include):
+        return include
+    return None
+
+
+def get_secrets(module):
+    match = name_filter(
+        module.params['include'],
+        module.params['exclude'],
+        module.params['include_regex'],
+        module.params['exclude_regex']
+    )
+    secrets = list_secrets(
+        module.client,
+        module.params['project'],
+        module.params['config'],
+        names=server_side_names(module)
+    )
+
+    keep = [k for k in ('raw', 'computed') if module.params[f"return_{k}"]]
+    return {
+        name: {k: value.get(k) for k in keep}
+        for name, value in secrets.items() if match(name)
+    }
+
+
+def run_module():
+    module = DopplerModule(
+        argument_spec=dict(
+            include=dict(type='list', elements='str'),
+            include_regex=dict(type='list', elements='str'),
+            exclude=dict(type='list', elements='str'),
+            exclude_regex=dict(type='list', elements='str'),
+            return_raw=dict(type='bool', default=True),
+            return_computed=dict(type='bool', default=True),
+        ),
+        supports_check_mode=True
+    )
+
+    if not module.params['project'] or not module.params['config']:
+        module.fail_json(msg="project and config must be provided")
+
+    try:
+        secrets = get_secrets(module)
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
+    except re.error as e:
+        module.fail_json(msg=f"Invalid regular expression: {e}")
+
+    module.exit_json(changed=False, count=len(secrets), secrets=secrets)
+
+
+def main():
+    run_profiled(run_module, 'doppler_secrets_info')
+
+
+if __name__ == '__main__':
+    main()
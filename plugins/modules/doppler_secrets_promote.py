@@ -0,0 +1,317 @@
+#!/usr/bin/python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+################################################################################
+# Documentation
+################################################################################
+
+ANSIBLE_METADATA = {'metadata_version': '1.1', 'status': ["preview"], 'supported_by': 'community'}
+
+DOCUMENTATION = r'''
+---
+module: doppler_secrets_promote
+short_description: Copy secrets from one Doppler config to others
+description:
+- Promote secrets from a source config, such as dev to stg to prd
+- The source config is read once, each target is read once, and only the secrets
+  that differ are sent to each target in one write
+- Several targets are updated concurrently
+- Secrets that exist only in a target are left alone
+author:
+- Dave Costakos <dcostako@redhat.com>
+options:
+  project:
+    description:
+    - Project of the source config, and of every target given as a plain config name
+    - Default set os env DOPPLER_PROJECT
+    type: str
+  source_config:
+    description:
+    - Name of the config secrets are copied from
+    type: str
+    required: true
+  source_project:
+    description:
+    - Project of the source config when it differs from I(project)
+    type: str
+  targets:
+    description:
+    - Configs the secrets are copied to
+    - Each item is either a config name in I(project) or a dict with C(project) and C(config) keys
+    type: list
+    elements: raw
+    required: true
+  include:
+    description:
+    - Only promote secrets whose name matches one of these glob patterns
+    - All secrets are promoted when neither I(include) nor I(include_regex) is set
+    type: list
+    elements: str
+  include_regex:
+    description:
+    - Only promote secrets whose name matches one of these regular expressions
+    type: list
+    elements: str
+  exclude:
+    description:
+    - Never promote secrets whose name matches one of these glob patterns
+    type: list
+    elements: str
+  exclude_regex:
+    description:
+    - Never promote secrets whose name matches one of these regular expressions
+    type: list
+    elements: str
+  value_type:
+    description:
+    - C(raw) copies values as written, so references like C(${OTHER}) resolve in each target
+    - C(computed) copies the values as resolved in the source config
+    type: str
+    default: raw
+    choices:
+    - raw
+    - computed
+  max_workers:
+    description:
+    - Maximum number of targets updated at the same time
+    type: int
+    default: 4
+  batch_size:
+    description:
+    - Maximum number of changes sent in one write to a target
+    type: int
+    default: 500
+  url:
+    description:
+    - the URL for the API instance of doppler
+    - May default to OS Environment variable DOPPLER_URL
+    type: str
+    required: False
+    default: https://api.doppler.com/v3
+  token:
+    description:
+    - Authentication token for doppler
+    - May default to OS Environment variable DOPPLER_TOKEN
+    type: str
+    required: False
+  timeout:
+    description:
+    - Requests timeout value for url get
+    type: int
+    required: False
+    default: 5
+extends_documentation_fragment:
+- dcostakos.doppler.doppler
+notes:
+- 'API Reference U(https://docs.doppler.com/reference/api)'
+- The C(DOPPLER_PROJECT), C(DOPPLER_ENVIRONMENT) and C(DOPPLER_CONFIG) secrets are never promoted
+- Check mode reports what would change without writing
+'''
+
+EXAMPLES = r'''
+- name: Promote every secret from dev to stg
+  dcostakos.doppler.doppler_secrets_promote:
+    project: secret_project
+    source_config: dev
+    targets:
+    - stg
+    token: my_token
+
+- name: Promote database settings from stg to every production config
+  dcostakos.doppler.doppler_secrets_promote:
+    project: secret_project
+    source_config: stg
+    include:
+    - DB_*
+    exclude_regex:
+    - _TEST$
+    targets:
+    - prd
+    - prd_eu
+    - project: other_project
+      config: prd
+    token: my_token
+  register: promotion
+'''
+
+RETURN = r'''
+changed:
+  description: Whether any target changed
+  returned: success
+  type: bool
+  sample: true
+doppler_metrics:
+  description:
+  - Summary of the API calls made by this task, per endpoint
+  - Same keys as the C(doppler_metrics) returned by M(dcostakos.doppler.doppler_secrets)
+  returned: always
+  type: dict
+  sample:
+    calls: 3
+    errors: 0
+    retries: 0
+    bytes: 7018
+    time_ms: 118.7
+    endpoints:
+      GET /configs/config/secrets:
+        calls: 2
+        errors: 0
+        retries: 0
+        bytes: 4608
+        status: {"200": 2}
+        time_ms: 66.1
+        max_ms: 35.2
+        latency_buckets: {"50": 2}
+      POST /configs/config/secrets:
+        calls: 1
+        errors: 0
+        retries: 0
+        bytes: 2410
+        status: {"200": 1}
+        time_ms: 52.6
+        max_ms: 52.6
+        latency_buckets: {"100": 1}
+source:
+  description: The source config and the number of secrets selected from it
+  returned: success
+  type: dict
+  sample: {"project": "secret_project", "config": "stg", "count": 3}
+targets:
+  description: Per target outcome, in the order the targets were given
+  returned: always
+  type: list
+  elements: dict
+  contains:
+    project:
+      description: Project of the target config
+      returned: always
+      type: str
+    config:
+      description: Name of the target config
+      returned: always
+      type: str
+    changed:
+      description: Whether this target changed
+      returned: success
+      type: bool
+    secrets:
+      description: Status of each promoted secret, one of created, updated or unchanged
+      returned: success
+      type: dict
+      sample: {"DB_HOST": "updated", "DB_USER": "unchanged"}
+    failed:
+      description: Set when this target could not be updated
+      returned: failure
+      type: bool
+    msg:
+      description: Why this target could not be updated
+      returned: failure
+      type: str
+'''
+
+# imports
+import re
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerException,
+    DopplerModule,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_profile import run_profiled
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_secrets_utils import (
+    RESERVED_SECRETS,
+    diff_secrets,
+    fan_out,
+    list_secrets,
+    name_filter,
+    normalize_targets,
+    write_secrets,
+)
+
+
+def read_source(module):
+    project = module.params['source_project'] or module.params['project']
+    if not project:
+        raise DopplerException("A project or source_project must be provided")
+    match = name_filter(
+        module.params['include'],
+        module.params['exclude'],
+        module.params['include_regex'],
+        module.params['exclude_regex']
+    )
+    secrets = list_secrets(module.client, project, module.params['source_config'])
+    value_type = module.params['value_type']
+    return {
+        name: value[value_type] for name, value in secrets.items()
+        if name not in RESERVED_SECRETS and match(name)
+    }
+
+
+def promote(module, source, project, config):
+    current = list_secrets(module.client, project, config)
+    changes, status = diff_secrets(current, source)
+    if changes and not module.check_mode:
+        write_secrets(module.client, project, config, changes, module.params['batch_size'])
+    return dict(project=project, config=config, changed=bool(changes), secrets=status)
+
+
+def run_module():
+    module = DopplerModule(
+        argument_spec=dict(
+            source_config=dict(type='str', required=True),
+            source_project=dict(type='str'),
+            targets=dict(type='list', elements='raw', required=True),
+            include=dict(type='list', elements='str'),
+            include_regex=dict(type='list', elements='str'),
+            exclude=dict(type='list', elements='str'),
+            exclude_regex=dict(type='list', elements='str'),
+            value_type=dict(type='str', default='raw', choices=['raw', 'computed']),
+            max_workers=dict(type='int', default=4),
+            batch_size=dict(type='int', default=500),
+        ),
+        supports_check_mode=True
+    )
+
+    if module.params['batch_size'] < 1:
+        module.fail_json(msg="batch_size must be at least 1")
+
+    try:
+        targets = normalize_targets(module.params['targets'], module.params['project'])
+        source = read_source(module)
+    except DopplerException as e:
+        module.fail_json(msg=str(e))
+    except re.error as e:
+        module.fail_json(msg=f"Invalid regular expression: {e}")
+
+    results = fan_out(
+        lambda project, config: promote(module, source, project, config),
+        targets,
+        module.params['max_workers']
+    )
+
+    result = dict(
+        changed=any(r.get('changed') for r in results),
+        source=dict(
+            project=module.params['source_project'] or module.params['project'],
+            config=module.params['source_config'],
+            count=len(source)
+        ),
+        targets=results
+    )
+
+    failed = [r for r in results if r.get('failed')]
+    if failed:
+        module.fail_json(
+            msg=f"Failed to promote secrets to {len(failed)} of {len(results)} targets",
+            **result
+        )
+
+    module.exit_json(**result)
+
+
+def main():
+    run_profiled(run_module, 'doppler_secrets_promote')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+
+from collections import OrderedDict
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+
+
+# stands in for the secrets of a config the API answered 404 for, so the
+# miss can be cached like any other result, JSON safe for the shared cache
+NOT_FOUND = '_doppler_not_found'
+
+
+def not_found(message):
+    return {NOT_FOUND: message}
+
+
+def is_not_found(secrets):
+    return NOT_FOUND in secrets
+
+
+def cache_key(url, token, project, config):
+    # never keep the token itself around as part of a key
+    token_hash = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    return (url.rstrip('/'), token_hash, project, config)
+
+
+class SecretsCache(object):
+    """Process-level TTL cache of config secrets with LRU eviction."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, ttl):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at < ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def age(self, key):
+        """Seconds since key was stored, None when it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else time.monotonic() - entry[0]
+
+    def put(self, key, value, max_entries):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return f"{self.hits} hits, {self.misses} misses, {len(self)} entries"
+
+
+def derive_key(token):
+    # Doppler tokens are long random strings, a keyed hash is enough to turn
+    # one into a Fernet key without storing anything derived from it on disk.
+    digest = hmac.new(token.encode('utf-8'), b'dcostakos.doppler shared cache', hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest)
+
+
+class SharedSecretsCache(object):
+    """File backed cache of config secrets shared by every fork on this machine.
+
+    Each config is stored as one Fernet encrypted file. Whoever holds the
+    matching lock file fetches the config, the other forks block on the lock
+    and then read what was written instead of calling the API themselves.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(directory)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _base(self, key):
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode('utf-8')).hexdigest())
+
+    def _paths(self, key):
+        base = self._base(key)
+        return f"{base}.cache", f"{base}.lock"
+
+    def _read(self, path, fernet, ttl):
+        if ttl <= 0:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            return json.loads(fernet.decrypt(data, ttl=ttl))
+        except InvalidToken:
+            # expired, or written under a different token
+            return None
+
+    def _write(self, path, fernet, value):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(fernet.encrypt(json.dumps(value).encode('utf-8')))
+            os.replace(tmp, path)
+        except Exception:
+            os.unlink(tmp)
+            raise
+
+    def get_or_fetch(self, key, token, ttl, fetch, max_age=None, cache_if=None):
+        # max_age refetches entries younger than ttl, still only once for all forks;
+        # a value cache_if rejects is returned but not stored, the next fork fetches again
+        if max_age is not None:
+            ttl = min(ttl, max_age)
+        fernet = Fernet(derive_key(token))
+        path, lock_path = self._paths(key)
+
+        value = self._read(path, fernet, ttl)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        with open(lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # another fork may have filled the entry while we waited
+                value = self._read(path, fernet, ttl)
+                if value is not None:
+                    self.hits += 1
+                    return value
+                self.misses += 1
+                value = fetch()
+                if cache_if is None or cache_if(value):
+                    self._write(path, fernet, value)
+                return value
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def next_execution(self, key, name):
+        """How often name already ran key, counted in a file shared by every fork.
+
+        Hosts and tasks each get a fresh worker process, so nothing kept in
+        memory survives from one execution to the next.
+        """
+        fd = os.open(f"{self._base(key)}.runs", os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                runs = json.loads(f.read() or '{}')
+                execution = runs.get(name, 0)
+                runs[name] = execution + 1
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(runs))
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return execution
+
+    def stats(self):
+        return f"{self.hits} hits, {self.misses} misses"
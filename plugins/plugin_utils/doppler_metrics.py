@@ -0,0 +1,41 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import glob
+import json
+import os
+
+# set by the dcostakos.doppler.doppler_metrics callback, inherited by every fork
+SPOOL_ENV = 'DOPPLER_METRICS_SPOOL'
+
+
+def spool_metrics(summary, host=None, source='lookup'):
+    """Hand the doppler_metrics of a lookup to the callback, if one is listening.
+
+    Lookups run in the worker forks and their results never reach the
+    callback, so each fork appends to its own NDJSON file in the spool.
+    """
+    spool = os.environ.get(SPOOL_ENV)
+    if not spool or not summary.get('calls'):
+        return
+    record = json.dumps(dict(host=host, source=source, doppler_metrics=summary))
+    try:
+        with open(os.path.join(spool, f"{source}-{os.getpid()}.ndjson"), 'a') as f:
+            f.write(record + '\n')
+    except OSError:
+        # metrics are best effort, never fail a lookup over them
+        pass
+
+
+def read_spool(spool):
+    for path in sorted(glob.glob(os.path.join(spool, '*.ndjson'))):
+        with open(path) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # a fork killed mid write
+                    continue
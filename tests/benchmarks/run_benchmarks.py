@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmarks for the collection against the local mock Doppler API.
+
+Every case runs a module or the lookup a few times against a fresh
+tests/utils/mock_doppler.py server and records, per iteration, the HTTP
+calls made, the bytes sent each way and the wall time, plus the latency
+percentiles the server saw:
+
+    python tests/benchmarks/run_benchmarks.py --output bench.json
+    python tests/benchmarks/run_benchmarks.py --baseline bench.json --only secrets_
+
+Modules run in their own python process like Ansible runs them, so wall
+times include interpreter start up and imports. The lookup runs in this
+process through the plugin loader, with its cache turned off.
+
+With --baseline, a case that now makes more calls or sends more bytes per
+iteration than the baseline is reported as a regression and the exit
+status is 1. Wall times are only compared when --max-slowdown is given,
+since they depend on the machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.insert(0, os.path.join(ROOT, 'tests', 'utils'))
+
+from mock_doppler import MockDopplerServer, percentile  # noqa: E402
+
+TOKEN = 'bench-token'
+
+
+def collections_path(workdir):
+    # the collection has to be importable as ansible_collections.dcostakos.doppler
+    parts = ROOT.split(os.sep)
+    if parts[-3:-2] == ['ansible_collections']:
+        return os.sep.join(parts[:-3])
+    link = os.path.join(workdir, 'ansible_collections', 'dcostakos', 'doppler')
+    os.makedirs(os.path.dirname(link), exist_ok=True)
+    os.symlink(ROOT, link)
+    return workdir
+
+
+def load_lookup(path):
+    # loaded once, before anything is timed
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    from ansible.plugins.loader import init_plugin_loader, lookup_loader
+    init_plugin_loader([path])
+    return lookup_loader.get('dcostakos.doppler.doppler_secrets')
+
+
+class Runner(object):
+    def __init__(self, server, workdir, path, lookup):
+        self.server = server
+        self.workdir = workdir
+        self.path = path
+        self.env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [path, os.environ.get('PYTHONPATH')])))
+        self._lookup = lookup
+
+    def module(self, module_name, **args):
+        args.setdefault('url', self.server.url)
+        args.setdefault('token', TOKEN)
+        args_file = os.path.join(self.workdir, 'args.json')
+        with open(args_file, 'w') as f:
+            json.dump({'ANSIBLE_MODULE_ARGS': args}, f)
+        proc = subprocess.run(
+            [sys.executable, '-m', f"ansible_collections.dcostakos.doppler.plugins.modules.{module_name}", args_file],
+            env=self.env, cwd=self.workdir, capture_output=True, text=True
+        )
+        try:
+            result = json.loads(proc.stdout)
+        except ValueError:
+            raise RuntimeError(f"{module_name} did not return JSON: {proc.stdout or proc.stderr}")
+        if result.get('failed'):
+            raise RuntimeError(f"{module_name} failed: {result.get('msg')}")
+        return result
+
+    def lookup(self, terms, **kwargs):
+        kwargs.setdefault('url', self.server.url)
+        kwargs.setdefault('token', TOKEN)
+        kwargs.setdefault('cache_ttl', 0)
+        return self._lookup.run(terms, variables={}, **kwargs)
+
+
+def secret_names(count):
+    return [f"SECRET_{i:05d}" for i in range(count)]
+
+
+def suffix(i):
+    # the environment and config modules snake case names and drop digits
+    letters = ''
+    while True:
+        letters = chr(ord('a') + i % 26) + letters
+        i = i // 26 - 1
+        if i < 0:
+            return letters
+
+
+def seed_config(server, project, config, count):
+    server.store.seed(dict(project=project, config=config, secrets={n: f"value-{n}" for n in secret_names(count)}))
+
+
+# Each case is (setup, run): setup(server) prepares the store once, run(runner, i)
+# is timed for every iteration i with the server stats reset just before.
+
+def lookup_case(count):
+    def setup(server):
+        seed_config(server, 'bench', 'dev', count)
+
+    def run(runner, i):
+        values = runner.lookup(secret_names(count), project='bench', config='dev')
+        assert len(values) == count
+    return setup, run
+
+
+def secrets_create():
+    def setup(server):
+        seed_config(server, 'bench', 'dev', 10)
+
+    def run(runner, i):
+        runner.module('doppler_secrets', project='bench', config='dev', name=f"NEW_{i}", value='created')
+    return setup, run
+
+
+def secrets_update():
+    def setup(server):
+        seed_config(server, 'bench', 'dev', 10)
+
+    def run(runner, i):
+        runner.module('doppler_secrets', project='bench', config='dev', name='SECRET_00000', value=f"updated-{i}")
+    return setup, run
+
+
+def secrets_noop():
+    def setup(server):
+        seed_config(server, 'bench', 'dev', 10)
+
+    def run(runner, i):
+        runner.module('doppler_secrets', project='bench', config='dev', name='SECRET_00000', value='value-SECRET_00000')
+    return setup, run
+
+
+def secrets_batch(count):
+    def setup(server):
+        seed_config(server, 'bench', 'dev', 10)
+
+    def run(runner, i):
+        runner.module('doppler_secrets', project='bench', config='dev',
+                      secrets={f"BATCH_{n:05d}": f"value-{i}" for n in range(count)})
+    return setup, run
+
+
+def environment_provision():
+    def setup(server):
+        server.store.add_project('bench')
+
+    def run(runner, i):
+        runner.module('doppler_environment', project='bench', environment=f"env_{suffix(i)}")
+    return setup, run
+
+
+def config_provision():
+    def setup(server):
+        server.store.add_project('bench')
+        server.store.add_environment('bench', 'dev')
+
+    def run(runner, i):
+        runner.module('doppler_config', project='bench', environment='dev', name=f"dev_{suffix(i)}")
+    return setup, run
+
+
+def list_projects(count):
+    def setup(server):
+        server.store.seed_workspace(projects=count, environments=0, secrets=0)
+
+    def run(runner, i):
+        assert runner.module('doppler_project', list=True)['count'] == count
+    return setup, run
+
+
+def list_configs(count):
+    def setup(server):
+        server.store.seed_workspace(projects=1, environments=1, configs=count - 1, secrets=0)
+
+    def run(runner, i):
+        assert runner.module('doppler_config', project='bench-0', environment='env0', list=True)['count'] == count
+    return setup, run
+
+
+def list_configs_dest(count):
+    def setup(server):
+        server.store.seed_workspace(projects=1, environments=1, configs=count - 1, secrets=0)
+
+    def run(runner, i):
+        dest = os.path.join(runner.workdir, 'configs.ndjson')
+        assert runner.module('doppler_config', project='bench-0', environment='env0', list=True, dest=dest)['count'] == count
+    return setup, run
+
+
+CASES = {
+    'lookup_1': lookup_case(1),
+    'lookup_100': lookup_case(100),
+    'lookup_10000': lookup_case(10000),
+    'secrets_create': secrets_create(),
+    'secrets_update': secrets_update(),
+    'secrets_noop': secrets_noop(),
+    'secrets_batch_100': secrets_batch(100),
+    'environment_provision': environment_provision(),
+    'config_provision': config_provision(),
+    'list_projects_1000': list_projects(1000),
+    'list_configs_1000': list_configs(1000),
+    'list_configs_1000_dest': list_configs_dest(1000),
+}
+
+
+def run_case(name, case, args, workdir, path, lookup):
+    setup, run = case
+    server = MockDopplerServer(token=TOKEN, latency=args.latency, jitter=args.jitter).start()
+    try:
+        setup(server)
+        runner = Runner(server, workdir, path, lookup)
+        iterations = []
+        latencies = []
+        for i in range(args.iterations):
+            server.stats.reset()
+            start = time.perf_counter()
+            run(runner, i)
+            wall = time.perf_counter() - start
+            with server.stats.lock:
+                endpoints = {k: v['count'] for k, v in server.stats.endpoints.items()}
+                for entry in server.stats.endpoints.values():
+                    latencies.extend(entry['latencies'])
+                iterations.append(dict(
+                    wall=wall,
+                    calls=server.stats.requests,
+                    bytes_in=server.stats.bytes_in,
+                    bytes_out=server.stats.bytes_out,
+                    endpoints=endpoints,
+                ))
+    finally:
+        server.stop()
+
+    walls = sorted(it['wall'] for it in iterations)
+    latencies.sort()
+    return dict(
+        iterations=len(iterations),
+        calls=max(it['calls'] for it in iterations),
+        endpoints=iterations[-1]['endpoints'],
+        bytes_in=max(it['bytes_in'] for it in iterations),
+        bytes_out=max(it['bytes_out'] for it in iterations),
+        wall_ms=dict(
+            mean=round(statistics.mean(walls) * 1000, 2),
+            p50=round(percentile(walls, 50) * 1000, 2),
+            p95=round(percentile(walls, 95) * 1000, 2),
+            p99=round(percentile(walls, 99) * 1000, 2),
+        ),
+        server_latency_ms=dict(
+            p50=round((percentile(latencies, 50) or 0) * 1000, 3),
+            p95=round((percentile(latencies, 95) or 0) * 1000, 3),
+            p99=round((percentile(latencies, 99) or 0) * 1000, 3),
+        ),
+    )
+
+
+def compare(results, baseline, max_slowdown=None):
+    regressions = []
+    for name, current in results['cases'].items():
+        before = baseline.get('cases', {}).get(name)
+        if before is None:
+            continue
+        for key in ('calls', 'bytes_in', 'bytes_out'):
+            if current[key] > before[key]:
+                regressions.append(f"{name}: {key} went from {before[key]} to {current[key]}")
+        if max_slowdown and current['wall_ms']['p50'] > before['wall_ms']['p50'] * max_slowdown:
+            regressions.append(
+                f"{name}: p50 wall time went from {before['wall_ms']['p50']} ms to {current['wall_ms']['p50']} ms"
+            )
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the collection against the local mock Doppler API')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the mock adds to every API response')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--only', action='append', default=[], help='run cases whose name contains this, may repeat')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--max-slowdown', type=float, help='also flag cases whose p50 wall time grew by this factor')
+    args = parser.parse_args()
+
+    from ansible import __version__ as ansible_version
+
+    results = dict(
+        meta=dict(
+            timestamp=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            revision=git_revision(),
+            python=platform.python_version(),
+            ansible=ansible_version,
+            iterations=args.iterations,
+            latency=args.latency,
+            jitter=args.jitter,
+        ),
+        cases={},
+    )
+
+    with tempfile.TemporaryDirectory(prefix='doppler-bench-') as workdir:
+        path = collections_path(workdir)
+        lookup = load_lookup(path)
+        for name, case in CASES.items():
+            if args.only and not any(o in name for o in args.only):
+                continue
+            result = run_case(name, case, args, workdir, path, lookup)
+            results['cases'][name] = result
+            print(
+                f"{name:24s} calls {result['calls']:4d}  out {result['bytes_out']:9d} B  "
+                f"in {result['bytes_in']:8d} B  wall p50 {result['wall_ms']['p50']:8.1f} ms  "
+                f"p95 {result['wall_ms']['p95']:8.1f} ms",
+                file=sys.stderr
+            )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.max_slowdown)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from unittest.mock import MagicMock
+
+from ansible_collections.dcostakos.doppler.plugins.action import doppler_secrets
+from ansible_collections.dcostakos.doppler.plugins.plugin_utils.doppler_cache import HAS_CRYPTOGRAPHY, HAS_FCNTL
+
+pytestmark = pytest.mark.skipif(not (HAS_CRYPTOGRAPHY and HAS_FCNTL), reason='coalescing needs cryptography and fcntl')
+
+
+@pytest.fixture
+def runs(tmp_path, monkeypatch):
+    """Module runs made on the controller, each returns its own sequence number."""
+    calls = []
+
+    def run_on_controller(self, module_args, task_vars):
+        calls.append(task_vars['inventory_hostname'])
+        return dict(changed=True, run=len(calls))
+
+    monkeypatch.setattr(doppler_secrets, 'RESULT_DIR', str(tmp_path))
+    monkeypatch.setattr(doppler_secrets.ActionModule, '_run_on_controller', run_on_controller)
+    return calls
+
+
+def run_task(host, batch, uuid='task-1', args=None):
+    # a fresh action per call, like the fresh worker Ansible forks per host and task
+    task = MagicMock(_uuid=uuid, args=dict(args or {'token': 't', 'name': 'A', 'value': 'fixed'}),
+                     async_val=0, check_mode=False)
+    action = doppler_secrets.ActionModule(task, MagicMock(), MagicMock(check_mode=False), MagicMock(), MagicMock(), MagicMock())
+    return action.run(task_vars={'inventory_hostname': host, 'ansible_play_batch': batch})
+
+
+def test_hosts_of_one_batch_share_one_run(runs):
+    results = [run_task(host, ['h1', 'h2', 'h3']) for host in ('h1', 'h2', 'h3')]
+    assert runs == ['h1']
+    assert [r['run'] for r in results] == [1, 1, 1]
+
+
+def test_every_serial_batch_runs_the_task(runs):
+    results = [run_task(host, [host]) for host in ('h1', 'h2', 'h3')]
+    assert runs == ['h1', 'h2', 'h3']
+    assert [r['run'] for r in results] == [1, 2, 3]
+
+
+def test_repeated_runs_in_one_batch_are_not_replayed(runs):
+    # until/retries attempts and handler flushes run the same task again
+    batch = ['h1', 'h2']
+    first = [run_task(host, batch)['run'] for host in batch]
+    second = [run_task(host, batch)['run'] for host in batch]
+    assert first == [1, 1]
+    assert second == [2, 2]
+    assert runs == ['h1', 'h1']
+
+
+def test_failures_are_not_shared(runs, monkeypatch):
+    def fail(self, module_args, task_vars):
+        runs.append(task_vars['inventory_hostname'])
+        return dict(failed=True, msg='boom')
+
+    monkeypatch.setattr(doppler_secrets.ActionModule, '_run_on_controller', fail)
+    for host in ('h1', 'h2'):
+        assert run_task(host, ['h1', 'h2'])['failed']
+    assert runs == ['h1', 'h2']
+
+
+@pytest.mark.parametrize('socket_path', ['/tmp/doppler-httpapi.sock', None])
+def test_persistent_connection_socket_reaches_the_module(monkeypatch, socket_path):
+    seen = {}
+
+    def execute_module(self, module_name=None, module_args=None, task_vars=None):
+        seen.update(task_vars)
+        return dict(changed=False)
+
+    monkeypatch.setattr(doppler_secrets.ActionModule, '_execute_module', execute_module)
+    monkeypatch.setattr(doppler_secrets.ActionModule, '_remove_tmp_path', lambda self, path: None)
+    connection = MagicMock(socket_path=socket_path)
+    action = doppler_secrets.ActionModule(MagicMock(), connection, MagicMock(), MagicMock(), MagicMock(), MagicMock())
+    # the local connection the module runs over on the controller
+    action._shared_loader_obj = MagicMock()
+    action._run_on_controller({'name': 'A'}, {'inventory_hostname': 'h1'})
+    assert seen.get('ansible_socket') == socket_path
+    # the local connection is swapped back once the module ran
+    assert action._connection is connection
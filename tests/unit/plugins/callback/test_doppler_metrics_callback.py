@@ -0,0 +1,37 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.dcostakos.doppler.plugins.callback.doppler_metrics import CallbackModule, percentile
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_metrics import CallMetrics
+
+
+def test_percentile_reads_bucket_bounds():
+    buckets = {'10': 90, '100': 9, '+Inf': 1}
+    assert percentile(buckets, 12000.0, 50) == 10.0
+    assert percentile(buckets, 12000.0, 95) == 100.0
+    assert percentile(buckets, 12000.0, 99.5) == 12000.0
+    # never above the slowest call
+    assert percentile({'100': 1}, 42.0, 99) == 42.0
+    assert percentile({}, 0.0, 50) is None
+
+
+def test_summaries_of_many_tasks_are_merged(monkeypatch):
+    callback = CallbackModule()
+    monkeypatch.setattr(callback, 'get_option', lambda name: 5)
+    for host, latency in (('h1', 0.004), ('h2', 0.04), ('h2', 0.2)):
+        metrics = CallMetrics()
+        metrics.record('GET', '/configs/config/secrets', 200, latency, size=10)
+        callback.add(metrics.summary(), host)
+
+    report = callback.report()
+    endpoint = report['endpoints']['GET /configs/config/secrets']
+    assert endpoint['calls'] == 3
+    assert endpoint['bytes'] == 30
+    assert endpoint['max_ms'] == 200.0
+    assert endpoint['avg_ms'] == 81.33
+    assert endpoint['p50_ms'] == 50.0
+    assert endpoint['p99_ms'] == 200.0
+    assert [h['host'] for h in report['slowest_hosts']] == ['h2', 'h1']
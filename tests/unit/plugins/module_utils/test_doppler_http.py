@@ -0,0 +1,153 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import http.client
+import socket
+import threading
+
+import pytest
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_http import (
+    DopplerConnectionError,
+    HTTPSession,
+    _stale,
+)
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import (
+    DopplerClient,
+    DopplerException,
+)
+
+OK = b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}'
+
+
+class RawServer(object):
+    """Answers the first request of every connection, then hangs up on or ignores the next one."""
+
+    def __init__(self, on_second='close', answer_first=True):
+        self.on_second = on_second
+        self.answer_first = answer_first
+        self.requests = []
+        self.sock = socket.socket()
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(8)
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}"
+        self._open = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self._open.append(conn)
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _read(self, f):
+        line = f.readline()
+        if not line:
+            return None
+        length = 0
+        while True:
+            header = f.readline()
+            if header in (b'\r\n', b''):
+                break
+            name, _, value = header.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        f.read(length)
+        return ' '.join(line.decode().split()[:2]).split('?')[0]
+
+    def _handle(self, conn):
+        f = conn.makefile('rb')
+        first = True
+        while True:
+            request = self._read(f)
+            if request is None:
+                return
+            self.requests.append(request)
+            if first and self.answer_first:
+                conn.sendall(OK)
+                first = False
+                continue
+            if self.on_second == 'close':
+                conn.close()
+                return
+            # 'hang': keep the socket open without answering, until the client gives up
+
+    def close(self):
+        self.sock.close()
+        for conn in self._open:
+            conn.close()
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(**kwargs):
+        servers.append(RawServer(**kwargs))
+        return servers[-1]
+
+    yield start
+    for s in servers:
+        s.close()
+
+
+def test_stale_socket_is_replayed_for_get(server):
+    srv = server()
+    session = HTTPSession()
+    session.request('GET', f"{srv.url}/one", timeout=2)
+    response = session.request('GET', f"{srv.url}/two", timeout=2)
+    assert response.status_code == 200
+    # the hang up on the warm socket is replayed on a fresh connection
+    assert srv.requests == ['GET /one', 'GET /two', 'GET /two']
+
+
+def test_post_that_reached_the_server_is_never_replayed(server):
+    srv = server()
+    session = HTTPSession()
+    session.request('GET', f"{srv.url}/one", timeout=2)
+    with pytest.raises(DopplerConnectionError):
+        session.request('POST', f"{srv.url}/configs/config/secrets", json={'a': 1}, timeout=2)
+    assert srv.requests == ['GET /one', 'POST /configs/config/secrets']
+
+
+def test_client_does_not_retry_a_post_after_a_hang_up(server):
+    srv = server()
+    client = DopplerClient(srv.url, 't', timeout=2, retry_backoff=0)
+    client.get('/one')
+    with pytest.raises(DopplerException, match='Unable to reach Doppler'):
+        client.post('/configs/config/secrets', json={'a': 1})
+    assert srv.requests.count('POST /configs/config/secrets') == 1
+
+
+@pytest.mark.parametrize('error, sent, method, expected', [
+    (BrokenPipeError(), False, 'POST', True),
+    (ConnectionResetError(), False, 'POST', True),
+    (http.client.RemoteDisconnected(), True, 'GET', True),
+    (http.client.RemoteDisconnected(), True, 'DELETE', True),
+    (http.client.RemoteDisconnected(), True, 'POST', False),
+    (ConnectionResetError(), True, 'GET', False),
+    (TimeoutError(), False, 'GET', False),
+    (TimeoutError(), True, 'GET', False),
+])
+def test_stale(error, sent, method, expected):
+    assert _stale(error, sent, method) is expected
+
+
+@pytest.mark.parametrize('backend', ['builtin', 'requests'])
+def test_read_timeout_is_retried_for_get_only(server, backend):
+    if backend == 'requests':
+        pytest.importorskip('requests')
+    srv = server(on_second='hang', answer_first=False)
+    client = DopplerClient(srv.url, 't', timeout=0.2, max_retries=1, retry_backoff=0, http_backend=backend)
+    with pytest.raises(DopplerException, match='Unable to reach Doppler'):
+        client.get('/configs/config/secrets')
+    with pytest.raises(DopplerException, match='Unable to reach Doppler'):
+        client.post('/configs/config/secrets', json={'a': 1})
+    assert srv.requests.count('GET /configs/config/secrets') == 2
+    assert srv.requests.count('POST /configs/config/secrets') == 1
@@ -0,0 +1,53 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_metrics import (
+    CallMetrics,
+    endpoint_template,
+    latency_bucket,
+)
+
+
+@pytest.mark.parametrize('latency_ms, bucket', [(0.3, '5'), (5, '5'), (5.1, '10'), (99, '100'), (10000, '10000'), (12000, '+Inf')])
+def test_latency_bucket(latency_ms, bucket):
+    assert latency_bucket(latency_ms) == bucket
+
+
+def test_endpoint_template():
+    assert endpoint_template('GET', '/configs/config/secrets?project=p') == 'GET /configs/config/secrets'
+    assert endpoint_template('DELETE', '/things/1234') == 'DELETE /things/{id}'
+
+
+def test_summary_totals():
+    metrics = CallMetrics()
+    metrics.record('GET', '/configs/config/secret', 200, 0.0213, size=190)
+    metrics.record('GET', '/configs/config/secret', 404, 0.004, size=40)
+    metrics.record('POST', '/configs/config/secrets', None, 0.3, retries=2)
+    summary = metrics.summary()
+    assert {k: summary[k] for k in ('calls', 'errors', 'retries', 'bytes', 'time_ms')} == dict(
+        calls=3, errors=1, retries=2, bytes=230, time_ms=325.3
+    )
+    get = summary['endpoints']['GET /configs/config/secret']
+    assert get['status'] == {'200': 1, '404': 1}
+    assert get['errors'] == 0
+    assert get['max_ms'] == 21.3
+    assert get['latency_buckets'] == {'25': 1, '5': 1}
+    assert summary['endpoints']['POST /configs/config/secrets']['status'] == {'error': 1}
+
+
+def test_summary_size_does_not_grow_with_calls():
+    metrics = CallMetrics()
+    sizes = []
+    for calls in (10, 10000):
+        while metrics.endpoints.get('GET /projects', {}).get('calls', 0) < calls:
+            metrics.record('GET', '/projects', 200, 0.02)
+        sizes.append(len(json.dumps(metrics.summary())))
+    # only the counters get more digits
+    assert sizes[1] - sizes[0] < 20
@@ -0,0 +1,23 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_ratelimit import rate_limit_error
+
+
+@pytest.mark.parametrize('rate, burst', [(None, None), (0, None), (2.5, None), (5, 1), (5, 10)])
+def test_rate_limit_error_accepts(rate, burst):
+    assert rate_limit_error(rate, burst) is None
+
+
+@pytest.mark.parametrize('rate, burst, match', [
+    (-1, None, 'rate_limit must be'),
+    (5, 0, 'rate_limit_burst must be'),
+    (5, -3, 'rate_limit_burst must be'),
+])
+def test_rate_limit_error_rejects(rate, burst, match):
+    assert match in rate_limit_error(rate, burst)
@@ -0,0 +1,66 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_utils import DopplerException
+from ansible_collections.dcostakos.doppler.plugins.module_utils.doppler_secrets_utils import (
+    diff_deletes,
+    diff_secrets,
+    to_secret_value,
+)
+
+
+def secret(raw):
+    return {'raw': raw, 'computed': raw}
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('text', 'text'),
+    (42, '42'),
+    (1.5, '1.5'),
+    (True, 'true'),
+    (False, 'false'),
+    ({'a': 1}, '{"a": 1}'),
+    ([1, 'b'], '[1, "b"]'),
+])
+def test_to_secret_value(value, expected):
+    assert to_secret_value(value) == expected
+
+
+def test_diff_secrets_statuses():
+    current = {'SAME': secret('1'), 'OLD': secret('old')}
+    changes, status = diff_secrets(current, {'SAME': 1, 'OLD': 'new', 'NEW': True})
+    assert status == {'SAME': 'unchanged', 'OLD': 'updated', 'NEW': 'created'}
+    assert changes == [
+        {'name': 'OLD', 'originalName': 'OLD', 'value': 'new'},
+        {'name': 'NEW', 'originalName': 'NEW', 'value': 'true'},
+    ]
+
+
+def test_diff_secrets_none_only_asserts_existence():
+    changes, status = diff_secrets({'A': secret('x')}, {'A': None})
+    assert changes == []
+    assert status == {'A': 'unchanged'}
+    with pytest.raises(DopplerException, match='MISSING'):
+        diff_secrets({}, {'MISSING': None})
+
+
+def test_diff_secrets_compares_raw_value():
+    current = {'REF': {'raw': '${OTHER}', 'computed': 'resolved'}}
+    changes, status = diff_secrets(current, {'REF': '${OTHER}'})
+    assert changes == []
+    assert status == {'REF': 'unchanged'}
+
+
+def test_diff_deletes():
+    changes, status = diff_deletes({'A': secret('1'), 'B': secret('2')}, ['A', 'GONE'])
+    assert status == {'A': 'deleted', 'GONE': 'absent'}
+    assert changes == [{'name': 'A', 'originalName': 'A', 'value': None, 'shouldDelete': True}]
+
+
+def test_diff_deletes_nothing_to_do():
+    assert diff_deletes({}, []) == ([], {})
@@ -0,0 +1,47 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import contextlib
+import json
+
+import pytest
+
+from unittest.mock import patch
+
+from ansible.module_utils import basic
+from ansible_collections.dcostakos.doppler.tests.utils.mock_doppler import MockDopplerServer
+
+try:
+    from ansible.module_utils.testing import patch_module_args
+except ImportError:
+    # ansible-core before 2.19
+    @contextlib.contextmanager
+    def patch_module_args(args):
+        with patch.object(basic, '_ANSIBLE_ARGS', json.dumps({'ANSIBLE_MODULE_ARGS': args}).encode('utf-8')):
+            yield
+
+TOKEN = 'unit-token'
+
+
+@pytest.fixture
+def doppler():
+    """A mock Doppler API, started for one test."""
+    with MockDopplerServer(token=TOKEN) as server:
+        yield server
+
+
+@pytest.fixture
+def run_module(doppler, capsys):
+    """Run a module's main() against the mock API and return its JSON result."""
+    def run(module, **args):
+        args.setdefault('url', doppler.url)
+        args.setdefault('token', TOKEN)
+        with patch_module_args(args):
+            with pytest.raises(SystemExit):
+                module.main()
+        return json.loads(capsys.readouterr().out)
+
+    return run
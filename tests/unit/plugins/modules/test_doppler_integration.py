@@ -0,0 +1,32 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible_collections.dcostakos.doppler.plugins.modules import doppler_integration
+
+ARGS = dict(project='p', environment='prd', name='aws-prd', type='aws_secrets_manager',
+            data={'role': 'arn:aws:iam::123456789012:role/doppler'}, return_request=False)
+
+
+def test_create_is_idempotent(run_module, doppler):
+    first = run_module(doppler_integration, **ARGS)
+    assert first['changed'] is True
+    second = run_module(doppler_integration, **ARGS)
+    assert second['changed'] is False
+    assert second['integration']['slug'] == first['integration']['slug']
+    assert [i['name'] for i in doppler.store.integrations.values()] == ['aws-prd']
+
+
+def test_existing_integration_is_found_by_slug(run_module, doppler):
+    slug = doppler.store.add_integration('aws-prd', 'aws_secrets_manager')['slug']
+    result = run_module(doppler_integration, **dict(ARGS, name=slug))
+    assert result['changed'] is False
+    assert len(doppler.store.integrations) == 1
+
+
+def test_create_needs_a_type(run_module):
+    result = run_module(doppler_integration, **dict(ARGS, type=None))
+    assert result['failed']
+    assert 'type is required' in result['msg']
@@ -0,0 +1,37 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.dcostakos.doppler.plugins.modules import (
+    doppler_config,
+    doppler_environment,
+    doppler_integration,
+    doppler_project,
+)
+
+MODULES = [
+    (doppler_project, {}),
+    (doppler_environment, {'project': 'p'}),
+    (doppler_config, {'project': 'p', 'environment': 'dev'}),
+    (doppler_integration, {'project': 'p', 'environment': 'dev'}),
+]
+
+
+@pytest.mark.parametrize('module, args', MODULES)
+@pytest.mark.parametrize('option, value', [('per_page', 0), ('per_page', -5), ('limit', 0)])
+def test_list_rejects_bad_paging(run_module, doppler, module, args, option, value):
+    result = run_module(module, list=True, **dict(args, **{option: value}))
+    assert result['failed']
+    assert result['msg'] == f"{option} must be at least 1, got {value}"
+    # nothing is sent to the API
+    assert doppler.stats.snapshot()['requests'] == 0
+
+
+def test_list_pages_through_every_project(run_module, doppler):
+    doppler.store.seed({'workspace': {'projects': 5, 'environments': 0, 'secrets': 0}})
+    result = run_module(doppler_project, list=True, per_page=2, return_request=False)
+    assert result['count'] == 5
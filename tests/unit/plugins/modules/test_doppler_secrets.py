@@ -0,0 +1,62 @@
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.dcostakos.doppler.plugins.modules import doppler_secrets
+from ansible_collections.dcostakos.doppler.plugins.modules.doppler_secrets import parse_dotenv
+
+
+def parse(text):
+    return dict(parse_dotenv(text.splitlines(True)))
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('A=plain', 'plain'),
+    ('A = spaced ', 'spaced'),
+    ('A=', ''),
+    ('A=value # note', 'value'),
+    ('A=value#kept', 'value#kept'),
+    ('A="quoted"', 'quoted'),
+    ("A='single'", 'single'),
+    ('A="quoted" # note', 'quoted'),
+    ("A='single'   # note", 'single'),
+    ('A="has # hash"', 'has # hash'),
+    ('A="has # hash" # note', 'has # hash'),
+    ('A="line\\nbreak"', 'line\nbreak'),
+    ("A='line\\nbreak'", 'line\\nbreak'),
+    ('A="say \\"hi\\"" # note', 'say "hi"'),
+    ('A="unterminated', '"unterminated'),
+    ('A="a" b', '"a" b'),
+    ('A=x=y', 'x=y'),
+    ('export A=exported', 'exported'),
+])
+def test_parse_dotenv_values(line, expected):
+    assert parse(line) == {'A': expected}
+
+
+def test_parse_dotenv_skips_blank_lines_and_comments():
+    text = '\n# comment\n  \nA=1\n   # indented comment\nB=2\n'
+    assert parse(text) == {'A': '1', 'B': '2'}
+
+
+def test_parse_dotenv_last_assignment_wins():
+    assert parse('A=1\nA=2\n') == {'A': '2'}
+
+
+@pytest.mark.parametrize('text', ['NOVALUE', '=value', '  = value'])
+def test_parse_dotenv_rejects_lines_without_a_name(text):
+    with pytest.raises(ValueError, match='line 2'):
+        parse(f"OK=1\n{text}\n")
+
+
+def test_result_leaves_retries_to_until_loops(run_module, doppler):
+    # retries is what Ansible reports for until: loops on a registered result
+    doppler.store.seed({'project': 'p', 'config': 'dev', 'secrets': {'A': '1'}})
+    result = run_module(doppler_secrets, project='p', config='dev', name='A')
+    assert 'retries' not in result
+    assert result['doppler_metrics']['retries'] == 0
+    assert result['doppler_metrics']['calls'] == 1
@@ -0,0 +1,728 @@
+#!/usr/bin/env python
+
+# GNU General Public License v3.0+ (see LICENSES/GPL-3.0-or-later.txt or https://www.gnu.org/licenses/gpl-3.0.txt)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Local stand-in for the Doppler v3 API.
+
+Serves projects, environments, configs, secrets and integrations from an
+in-memory store, with optional latency, 429 rate limiting and error
+injection, so the modules and the lookup can be run and benchmarked
+offline by pointing their url at it:
+
+    python tests/utils/mock_doppler.py --port 8765 --token t --seed-workspace 2,3,2,100
+    DOPPLER_URL=http://127.0.0.1:8765/v3 ansible-playbook ...
+
+Only the standard library is used. The server can also be started in
+process with MockDopplerServer, which is what the benchmarks do.
+
+Everything under /_mock/ controls the server rather than the API:
+
+    GET  /_mock/stats    request counts, bytes and latency per endpoint
+    POST /_mock/reset    drop the store and the stats
+    POST /_mock/seed     add data, see Store.seed
+    POST /_mock/fail     answer the next {"count"} requests with {"status"} and {"headers"}
+    POST /_mock/config   change latency, jitter, error_rate or rate_limit at runtime
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+RESERVED_SECRETS = ('DOPPLER_PROJECT', 'DOPPLER_ENVIRONMENT', 'DOPPLER_CONFIG')
+REFERENCE = re.compile(r'\$\{([A-Za-z0-9_]+)\}')
+DEFAULT_PER_PAGE = 20
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+def now():
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+
+
+class Store(object):
+    """Projects, environments, configs, secrets and integrations, keyed like Doppler does."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.projects = {}
+        self.environments = {}
+        self.configs = {}
+        self.secrets = {}
+        self.integrations = {}
+
+    # projects
+
+    def add_project(self, name, description=''):
+        with self.lock:
+            if name in self.projects:
+                raise BadRequest(f"Project {name} already exists")
+            project = dict(id=name, slug=name, name=name, description=description or '', created_at=now())
+            self.projects[name] = project
+            return project
+
+    def project(self, name):
+        try:
+            return self.projects[name]
+        except KeyError:
+            raise NotFound(f"Could not find requested project '{name}'")
+
+    def delete_project(self, name):
+        with self.lock:
+            self.project(name)
+            del self.projects[name]
+            for store in (self.environments, self.configs, self.secrets):
+                for key in [k for k in store if k[0] == name]:
+                    del store[key]
+
+    # environments
+
+    def add_environment(self, project, name, slug=None):
+        with self.lock:
+            self.project(project)
+            slug = slug or name
+            if (project, slug) in self.environments:
+                raise BadRequest(f"Environment {slug} already exists")
+            environment = dict(
+                id=slug, slug=slug, name=name, project=project,
+                created_at=now(), initial_fetch_at=None
+            )
+            self.environments[(project, slug)] = environment
+            # Doppler gives every environment a root config of the same name
+            self.add_config(project, slug, slug, root=True)
+            return environment
+
+    def environment(self, project, slug):
+        self.project(project)
+        try:
+            return self.environments[(project, slug)]
+        except KeyError:
+            raise NotFound(f"Could not find requested environment '{slug}'")
+
+    def delete_environment(self, project, slug):
+        with self.lock:
+            self.environment(project, slug)
+            del self.environments[(project, slug)]
+            for name in [c['name'] for c in self.configs.values() if c['project'] == project and c['environment'] == slug]:
+                self.configs.pop((project, name), None)
+                self.secrets.pop((project, name), None)
+
+    # configs
+
+    def add_config(self, project, environment, name, root=False):
+        with self.lock:
+            self.environment(project, environment)
+            if (project, name) in self.configs:
+                raise BadRequest(f"Config {name} already exists")
+            config = dict(
+                name=name, slug=str(uuid.uuid4()), project=project, environment=environment,
+                root=root, locked=root, created_at=now(), initial_fetch_at=None, last_fetch_at=None
+            )
+            self.configs[(project, name)] = config
+            self.secrets[(project, name)] = {}
+            return config
+
+    def config(self, project, name):
+        self.project(project)
+        try:
+            return self.configs[(project, name)]
+        except KeyError:
+            raise NotFound(f"Could not find requested config '{name}'")
+
+    def delete_config(self, project, name):
+        with self.lock:
+            config = self.config(project, name)
+            if config['locked']:
+                raise BadRequest(f"Config {name} is locked")
+            del self.configs[(project, name)]
+            self.secrets.pop((project, name), None)
+
+    # secrets
+
+    def raw_secrets(self, project, config):
+        c = self.config(project, config)
+        secrets = dict(self.secrets[(project, config)])
+        secrets.update(DOPPLER_PROJECT=project, DOPPLER_ENVIRONMENT=c['environment'], DOPPLER_CONFIG=config)
+        return secrets
+
+    def computed_secrets(self, project, config, names=None):
+        raw = self.raw_secrets(project, config)
+
+        def compute(value, depth=0):
+            if depth > 10:
+                return value
+            return REFERENCE.sub(lambda m: compute(raw.get(m.group(1), ''), depth + 1), value)
+
+        return {
+            name: dict(raw=value, computed=compute(value), note='')
+            for name, value in raw.items() if names is None or name in names
+        }
+
+    def change_secrets(self, project, config, change_requests):
+        with self.lock:
+            self.config(project, config)
+            secrets = self.secrets[(project, config)]
+            for change in change_requests:
+                name = change.get('name') or change.get('originalName')
+                if name in RESERVED_SECRETS:
+                    raise BadRequest(f"Secret {name} is reserved")
+                if change.get('shouldDelete'):
+                    secrets.pop(change.get('originalName') or name, None)
+                    continue
+                if change.get('originalName') and change['originalName'] != name:
+                    secrets.pop(change['originalName'], None)
+                secrets[name] = '' if change.get('value') is None else str(change['value'])
+
+    def set_secrets(self, project, config, values):
+        with self.lock:
+            self.config(project, config)
+            secrets = self.secrets[(project, config)]
+            for name, value in values.items():
+                if value is None:
+                    secrets.pop(name, None)
+                else:
+                    secrets[name] = str(value)
+
+    # integrations
+
+    def add_integration(self, name, kind, data=None):
+        with self.lock:
+            slug = str(uuid.uuid4())
+            integration = dict(slug=slug, name=name, type=kind, kind=kind, enabled=True, syncs=[], data=data or {})
+            self.integrations[slug] = integration
+            return integration
+
+    def integration(self, slug):
+        try:
+            return self.integrations[slug]
+        except KeyError:
+            raise NotFound(f"Could not find requested integration '{slug}'")
+
+    # seeding
+
+    def ensure_config(self, project, config):
+        with self.lock:
+            if project not in self.projects:
+                self.add_project(project)
+            environment = config.split('_')[0]
+            if (project, environment) not in self.environments:
+                self.add_environment(project, environment)
+            if (project, config) not in self.configs:
+                self.add_config(project, environment, config)
+
+    def seed(self, spec):
+        """Add data to the store.
+
+        Either one config, created along with its project and environment
+        when missing: {"project": "p", "config": "dev", "secrets": {"A": "1"}}
+
+        Or a synthetic workspace: {"workspace": {"projects": 2, "environments": 3,
+        "configs": 2, "secrets": 100, "integrations": 0, "prefix": "bench"}}, where
+        configs counts the branch configs made next to each root config.
+        """
+        if 'workspace' in spec:
+            return self.seed_workspace(**spec['workspace'])
+        self.ensure_config(spec['project'], spec['config'])
+        self.set_secrets(spec['project'], spec['config'], spec.get('secrets') or {})
+        return dict(projects=1, configs=1, secrets=len(spec.get('secrets') or {}))
+
+    def seed_workspace(self, projects=1, environments=3, configs=0, secrets=10, integrations=0, prefix='bench'):
+        counts = dict(projects=0, environments=0, configs=0, secrets=0, integrations=0)
+        values = {f"SECRET_{i:05d}": f"value-{i}" for i in range(secrets)}
+        with self.lock:
+            for p in range(projects):
+                project = f"{prefix}-{p}"
+                if project not in self.projects:
+                    self.add_project(project, f"Synthetic project {p}")
+                    counts['projects'] += 1
+                for e in range(environments):
+                    environment = f"env{e}"
+                    if (project, environment) not in self.environments:
+                        self.add_environment(project, environment)
+                        counts['environments'] += 1
+                    names = [environment] + [f"{environment}_{c}" for c in range(configs)]
+                    for name in names:
+                        if (project, name) not in self.configs:
+                            self.add_config(project, environment, name)
+                        self.secrets[(project, name)].update(values)
+                        counts['configs'] += 1
+                        counts['secrets'] += len(values)
+            for i in range(integrations):
+                self.add_integration(f"{prefix}-integration-{i}", 'aws_secrets_manager')
+                counts['integrations'] += 1
+        return counts
+
+
+class Stats(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.requests = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+
+    def record(self, endpoint, status, bytes_in, bytes_out, elapsed):
+        with self.lock:
+            entry = self.endpoints.setdefault(endpoint, dict(count=0, statuses={}, bytes_in=0, bytes_out=0, latencies=[]))
+            entry['count'] += 1
+            entry['statuses'][str(status)] = entry['statuses'].get(str(status), 0) + 1
+            entry['bytes_in'] += bytes_in
+            entry['bytes_out'] += bytes_out
+            entry['latencies'].append(elapsed)
+            self.requests += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {}
+            for endpoint, entry in self.endpoints.items():
+                latencies = sorted(entry['latencies'])
+                endpoints[endpoint] = dict(
+                    count=entry['count'],
+                    statuses=dict(entry['statuses']),
+                    bytes_in=entry['bytes_in'],
+                    bytes_out=entry['bytes_out'],
+                    p50=percentile(latencies, 50),
+                    p95=percentile(latencies, 95),
+                    p99=percentile(latencies, 99),
+                )
+            return dict(requests=self.requests, bytes_in=self.bytes_in, bytes_out=self.bytes_out, endpoints=endpoints)
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, int(math.ceil(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Faults(object):
+    """Latency, rate limiting and error injection shared by every request."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=None, seed=None):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.queued = []
+        self._tokens = None
+        self._stamp = None
+
+    def configure(self, **settings):
+        with self.lock:
+            for name in ('latency', 'jitter', 'error_rate', 'rate_limit'):
+                if name in settings:
+                    setattr(self, name, settings[name])
+            self._tokens = None
+
+    def queue(self, count, status, headers=None):
+        with self.lock:
+            self.queued.extend([(status, headers or {})] * count)
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def injected(self):
+        """Return (status, headers) to answer with instead of the real response, or None."""
+        with self.lock:
+            if self.queued:
+                return self.queued.pop(0)
+
+            if self.rate_limit:
+                now = time.time()
+                if self._tokens is None:
+                    self._tokens, self._stamp = float(self.rate_limit), now
+                self._tokens = min(float(self.rate_limit), self._tokens + (now - self._stamp) * self.rate_limit)
+                self._stamp = now
+                if self._tokens < 1:
+                    wait = (1 - self._tokens) / self.rate_limit
+                    return 429, {
+                        'Retry-After': str(max(1, int(math.ceil(wait)))),
+                        'X-RateLimit-Limit': str(int(self.rate_limit)),
+                        'X-RateLimit-Remaining': '0',
+                        'X-RateLimit-Reset': str(int(math.ceil(now + wait))),
+                    }
+                self._tokens -= 1
+
+            if self.error_rate and self.random.random() < self.error_rate:
+                return self.random.choice((500, 502, 503)), {}
+        return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockDoppler/1.0'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, fmt, *args)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+    def handle_request(self, method):
+        start = time.time()
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = None
+
+        path = parts.path
+        if path.startswith('/_mock/'):
+            status, payload, headers = self.control(method, path, body or {})
+            self.respond(status, payload, headers)
+            return
+
+        if path.startswith('/v3'):
+            path = path[3:]
+        endpoint = f"{method} {path}"
+        delay = self.server.faults.delay()
+        if delay:
+            time.sleep(delay)
+
+        injected = self.server.faults.injected()
+        if injected is not None:
+            status, headers = injected
+            payload = dict(messages=['Injected failure' if status != 429 else 'Rate limit exceeded'], success=False)
+        elif body is None:
+            status, payload, headers = 400, dict(messages=['Invalid JSON body'], success=False), {}
+        elif not self.authorized():
+            status, payload, headers = 401, dict(messages=['Invalid Service token'], success=False), {}
+        else:
+            status, payload, headers = self.dispatch(method, path, query, body)
+
+        # recorded before the client can see the response, so stats read right
+        # after a call returns always include it
+        data = self.encode(payload)
+        self.server.stats.record(endpoint, status, len(raw), len(data), time.time() - start)
+        self.respond(status, payload, headers, data)
+
+    def authorized(self):
+        token = self.server.token
+        return token is None or self.headers.get('Authorization') == f"Bearer {token}"
+
+    def encode(self, payload):
+        return json.dumps(payload).encode('utf-8')
+
+    def respond(self, status, payload, headers=None, data=None):
+        if data is None:
+            data = self.encode(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def control(self, method, path, body):
+        server = self.server
+        if path == '/_mock/stats' and method == 'GET':
+            return 200, server.stats.snapshot(), {}
+        if path == '/_mock/reset' and method == 'POST':
+            server.reset()
+            return 200, dict(success=True), {}
+        if path == '/_mock/seed' and method == 'POST':
+            try:
+                return 200, dict(success=True, seeded=server.store.seed(body)), {}
+            except (BadRequest, NotFound, KeyError, TypeError) as e:
+                return 400, dict(success=False, messages=[str(e)]), {}
+        if path == '/_mock/fail' and method == 'POST':
+            server.faults.queue(int(body.get('count', 1)), int(body.get('status', 429)), body.get('headers'))
+            return 200, dict(success=True), {}
+        if path == '/_mock/config' and method == 'POST':
+            server.faults.configure(**body)
+            return 200, dict(success=True), {}
+        return 404, dict(success=False, messages=[f"Unknown control endpoint {method} {path}"]), {}
+
+    def dispatch(self, method, path, query, body):
+        route = ROUTES.get((method, path))
+        if route is None:
+            return 404, dict(messages=[f"Unknown endpoint {method} {path}"], success=False), {}
+        # Doppler takes identifiers from the query string, the modules send some in the body
+        args = dict(body) if isinstance(body, dict) else {}
+        args.update(query)
+        try:
+            payload = route(self.server.store, args)
+        except NotFound as e:
+            return 404, dict(messages=[str(e)], success=False), {}
+        except (BadRequest, KeyError) as e:
+            return 400, dict(messages=[f"Bad request: {e}"], success=False), {}
+        payload.setdefault('success', True)
+        return 200, payload, {}
+
+
+def paginate(items, args):
+    page = int(args.get('page') or 1)
+    per_page = int(args.get('per_page') or DEFAULT_PER_PAGE)
+    return items[(page - 1) * per_page:page * per_page], page
+
+
+def list_projects(store, args):
+    with store.lock:
+        items, page = paginate(list(store.projects.values()), args)
+    return dict(projects=items, page=page)
+
+
+def create_project(store, args):
+    return dict(project=store.add_project(args['name'], args.get('description')))
+
+
+def get_project(store, args):
+    return dict(project=store.project(args['project']))
+
+
+def update_project(store, args):
+    with store.lock:
+        project = store.project(args['project'])
+        if 'description' in args:
+            project['description'] = args['description'] or ''
+        if args.get('name') and args['name'] != project['name']:
+            project['name'] = args['name']
+        return dict(project=project)
+
+
+def delete_project(store, args):
+    store.delete_project(args['project'])
+    return {}
+
+
+def list_environments(store, args):
+    store.project(args['project'])
+    with store.lock:
+        # not paginated, like the real endpoint
+        items = [e for (p, _), e in store.environments.items() if p == args['project']]
+    return dict(environments=items, page=1)
+
+
+def create_environment(store, args):
+    return dict(environment=store.add_environment(args['project'], args['name'], args.get('slug')))
+
+
+def get_environment(store, args):
+    return dict(environment=store.environment(args['project'], args['environment']))
+
+
+def delete_environment(store, args):
+    store.delete_environment(args['project'], args['environment'])
+    return {}
+
+
+def list_configs(store, args):
+    store.project(args['project'])
+    with store.lock:
+        items = [
+            c for (p, _), c in store.configs.items()
+            if p == args['project'] and (not args.get('environment') or c['environment'] == args['environment'])
+        ]
+    items, page = paginate(items, args)
+    return dict(configs=items, page=page)
+
+
+def create_config(store, args):
+    return dict(config=store.add_config(args['project'], args['environment'], args['name']))
+
+
+def get_config(store, args):
+    return dict(config=store.config(args['project'], args['config']))
+
+
+def delete_config(store, args):
+    store.delete_config(args['project'], args['config'])
+    return {}
+
+
+def list_secrets(store, args):
+    names = None
+    if args.get('secrets'):
+        names = set(args['secrets'].split(','))
+    with store.lock:
+        return dict(secrets=store.computed_secrets(args['project'], args['config'], names))
+
+
+def update_secrets(store, args):
+    if 'change_requests' in args:
+        store.change_secrets(args['project'], args['config'], args['change_requests'])
+    else:
+        store.set_secrets(args['project'], args['config'], args.get('secrets') or {})
+    with store.lock:
+        return dict(secrets=store.computed_secrets(args['project'], args['config']))
+
+
+def get_secret(store, args):
+    with store.lock:
+        secrets = store.computed_secrets(args['project'], args['config'], {args['name']})
+    if args['name'] not in secrets:
+        raise NotFound(f"Could not find requested secret '{args['name']}'")
+    value = secrets[args['name']]
+    return dict(name=args['name'], value=dict(raw=value['raw'], computed=value['computed']))
+
+
+def delete_secret(store, args):
+    get_secret(store, args)
+    store.set_secrets(args['project'], args['config'], {args['name']: None})
+    return {}
+
+
+def list_integrations(store, args):
+    with store.lock:
+        return dict(integrations=list(store.integrations.values()))
+
+
+def create_integration(store, args):
+    return dict(integration=store.add_integration(args['name'], args['type'], args.get('data')))
+
+
+def get_integration(store, args):
+    return dict(integration=store.integration(args['integration']))
+
+
+def delete_integration(store, args):
+    with store.lock:
+        store.integration(args['integration'])
+        del store.integrations[args['integration']]
+    return {}
+
+
+ROUTES = {
+    ('GET', '/projects'): list_projects,
+    ('POST', '/projects'): create_project,
+    ('GET', '/projects/project'): get_project,
+    ('POST', '/projects/project'): update_project,
+    ('DELETE', '/projects/project'): delete_project,
+    ('GET', '/environments'): list_environments,
+    ('POST', '/environments'): create_environment,
+    ('GET', '/environments/environment'): get_environment,
+    ('DELETE', '/environments/environment'): delete_environment,
+    ('GET', '/configs'): list_configs,
+    ('POST', '/configs'): create_config,
+    ('GET', '/configs/config'): get_config,
+    ('DELETE', '/configs/config'): delete_config,
+    ('GET', '/configs/config/secrets'): list_secrets,
+    ('POST', '/configs/config/secrets'): update_secrets,
+    ('GET', '/configs/config/secret'): get_secret,
+    ('DELETE', '/configs/config/secret'): delete_secret,
+    ('GET', '/integrations'): list_integrations,
+    ('POST', '/integrations'): create_integration,
+    ('GET', '/integrations/integration'): get_integration,
+    ('DELETE', '/integrations/integration'): delete_integration,
+}
+
+
+class MockDopplerServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, token=None, verbose=False, **faults):
+        ThreadingHTTPServer.__init__(self, (host, port), Handler)
+        self.token = token
+        self.verbose = verbose
+        self.store = Store()
+        self.stats = Stats()
+        self.faults = Faults(**faults)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def reset(self):
+        self.store = Store()
+        self.stats.reset()
+        self.faults.queued = []
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Doppler v3 API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--token', help='only accept this bearer token, any token is accepted when not set')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every API response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random +/- seconds around the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of API requests answered with a 5xx')
+    parser.add_argument('--rate-limit', type=float, help='requests per second before answering 429')
+    parser.add_argument('--random-seed', type=int, help='make latency jitter and errors reproducible')
+    parser.add_argument('--seed', action='append', default=[], metavar='FILE',
+                        help='JSON file holding one seed spec or a list of them, see Store.seed')
+    parser.add_argument('--seed-workspace', metavar='P,E,C,S',
+                        help='synthetic workspace of P projects, E environments, C branch configs and S secrets')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    server = MockDopplerServer(
+        args.host, args.port, token=args.token, verbose=args.verbose,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, seed=args.random_seed
+    )
+    for path in args.seed:
+        with open(path) as f:
+            specs = json.load(f)
+        for spec in specs if isinstance(specs, list) else [specs]:
+            server.store.seed(spec)
+    if args.seed_workspace:
+        p, e, c, s = (int(n) for n in args.seed_workspace.split(','))
+        server.store.seed_workspace(projects=p, environments=e, configs=c, secrets=s)
+
+    print(f"Mock Doppler API listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()